@@ -87,7 +87,10 @@ def _generate_mjpeg_stream(camera_manager):
     Yields:
         bytes: JPEG frame data
     """
+    frame_seq = 0
     while True:
+        # Send each captured frame once instead of resending the same one in a tight loop
+        frame_seq, _ = camera_manager.get_frame_since(frame_seq)
         frame = camera_manager.get_jpeg_frame()
         if frame:
             yield (b'--frame\r\n'
@@ -7,12 +7,8 @@ API Server Module - Provides HTTP and WebSocket interfaces for frontend applicat
 
 import logging
 import threading
-import time
 from flask import Flask
 from flask_socketio import SocketIO
-import argparse
-import signal
-import sys
 
 # Import API endpoints
 from .endpoints.bed import bed_api, init_bed_api
@@ -301,95 +297,14 @@ class APIServer:
         self.camera_manager.close_debug_window()
         logger.info("Camera debug window closed")
 
-def parse_args():
-    """Parse command line arguments"""
-    parser = argparse.ArgumentParser(description="Baby Monitoring System API Server")
-    parser.add_argument('--host', type=str, default='0.0.0.0', help='Host to listen on')
-    parser.add_argument('--port', type=int, default=5000, help='Port to listen on')
-    parser.add_argument('--debug', action='store_true', help='Enable debug mode')
-    parser.add_argument('--debug-camera', action='store_true', help='Enable camera debug window')
-    parser.add_argument('--no-arduino', action='store_true', help='Run without Arduino controller')
-    return parser.parse_args()
-
-def setup(args=None):
-    """Set up the API server"""
-    if args is None:
-        args = parse_args()
-    
-    # Set up logging
-    logging.basicConfig(
-        level=logging.DEBUG if args.debug else logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
-    logger.info("Setting up API server")
-    
-    # Initialize Arduino controller (if not disabled)
-    arduino_controller = None
-    if not args.no_arduino:
-        try:
-            from modules.arduino.controller import ArduinoController
-            from utils.device_discovery import discover_arduino_device
-            
-            # Try to discover Arduino device
-            port = discover_arduino_device()
-            if port:
-                arduino_controller = ArduinoController(port=port)
-                logger.info(f"Arduino controller initialized on port {port}")
-            else:
-                logger.warning("No Arduino device found, running in camera-only mode")
-        except Exception as e:
-            logger.error(f"Error initializing Arduino controller: {e}")
-    else:
-        logger.info("Arduino controller disabled by command line argument")
-    
-    # Initialize camera manager
-    camera_manager = None
-    try:
-        from modules.camera.camera_manager import CameraManager
-        camera_manager = CameraManager()
-        logger.info("Camera manager initialized")
-    except Exception as e:
-        logger.error(f"Error initializing camera manager: {e}")
-    
-    # Create API server
-    api_server = APIServer(
-        arduino_controller=arduino_controller,
-        camera_manager=camera_manager,
-        host=args.host,
-        port=args.port,
-        debug=args.debug
-    )
-    
-    # Start camera debug window if requested
-    if args.debug_camera and camera_manager:
-        api_server.start_camera_debug()
-    
-    return api_server
-
 def main():
-    """Main entry point"""
-    args = parse_args()
-    api_server = setup(args)
-    
-    # Set up signal handlers
-    def signal_handler(sig, frame):
-        logger.info("Received shutdown signal")
-        api_server.stop()
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
-    # Start server
-    api_server.start()
-    
-    try:
-        # Keep main thread alive
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        api_server.stop()
+    """
+    Standalone entry point (python -m api.server), kept so existing launch commands
+    keep working. Starts the full system through app.py, which accepts the same
+    --host/--port/--debug/--debug-camera/--no-arduino options.
+    """
+    import app
+    app.main()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
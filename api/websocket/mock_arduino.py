@@ -1,10 +1,10 @@
 import random
-import time
 from threading import Thread, Event
 
 class MockArduinoController:
-    def __init__(self):
-        self.subscribers = []
+    def __init__(self, update_interval=5):
+        self.subscribers = ()  # Immutable, replaced on change (copy-on-write) so notifying needs no lock
+        self.update_interval = update_interval  # Update heart rate every 5 seconds by default
         self._stop_event = Event()
         self._thread = None
 
@@ -13,7 +13,9 @@ class MockArduinoController:
         return random.randint(60, 100)
 
     def subscribe_heart_rate(self, callback):
-        self.subscribers.append(callback)
+        # Each callback is registered once, re-subscribing doesn't duplicate notifications
+        if callback not in self.subscribers:
+            self.subscribers = self.subscribers + (callback,)
         # Only start the thread once
         if self._thread is None or not self._thread.is_alive():
             self._stop_event.clear()
@@ -21,11 +23,12 @@ class MockArduinoController:
             self._thread.start()
 
     def _simulate_heart_rate_updates(self):
+        # One shared ticker for all subscribers, wakes up immediately on stop()
         while not self._stop_event.is_set():
             heart_rate = self.get_heart_rate()
             for callback in self.subscribers:
                 callback(heart_rate)
-            time.sleep(5)  # Update heart rate every 5 seconds
+            self._stop_event.wait(self.update_interval)
 
     def stop(self):
         """Stop simulation thread"""
@@ -5,26 +5,40 @@
 Baby Intelligent Monitoring System Main Program
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import signal
 import sys
 import argparse
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from utils.logger import BufferedFileHandler
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
+# Records are handed to a queue and written by a background listener thread,
+# so camera and Arduino threads never block on console or SD card I/O
+log_queue = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('baby_monitor.log')
+        logging.handlers.QueueHandler(log_queue)
     ]
 )
+log_listener = logging.handlers.QueueListener(
+    log_queue,
+    logging.StreamHandler(),
+    BufferedFileHandler('baby_monitor.log')
+)
+log_listener.start()
+atexit.register(log_listener.stop)  # Flush pending records on exit
 logger = logging.getLogger(__name__)
 
 # Import modules
@@ -34,6 +48,14 @@ from modules.auto_face_tracker import AutoFaceTracker  # Import auto face tracki
 from api.server import APIServer
 from config.settings import get_config
 
+# Preset feature toggles for --mode, applied on top of the individual flags
+MODE_PRESETS = {
+    'basic': {},
+    'debug': {'debug_camera': True},
+    'face': {'enable_face_detection': True},
+    'tracker': {'enable_face_detection': True, 'enable_face_tracker': True},
+}
+
 def parse_args():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(description='Baby Intelligent Monitoring System')
@@ -51,33 +73,48 @@ def parse_args():
                         help='Disable AI face recognition (overrides config.json setting)')
     parser.add_argument('--enable-face-tracker', action='store_true',
                         help='Enable automatic face tracking')
-    return parser.parse_args()
-
-def setup(args):
-    """Initialize system components"""
-    logger.info("Baby Intelligent Monitoring System starting...")
+    parser.add_argument('--host', type=str, default=None,
+                        help='Host for the API server to listen on (overrides config.json setting)')
+    parser.add_argument('--port', type=int, default=None,
+                        help='Port for the API server to listen on (overrides config.json setting)')
+    parser.add_argument('--debug', action='store_true',
+                        help='Enable API server debug mode')
+    parser.add_argument('--pin-threads', action='store_true',
+                        help='Pin camera capture, recording and face tracking threads to their own CPU cores '
+                             '(4+ cores, overrides config.json setting)')
+    parser.add_argument('--mode', choices=sorted(MODE_PRESETS), default='basic',
+                        help='Preset feature combination (debug: camera debug window, '
+                             'face: AI face detection, tracker: face detection + auto face tracking)')
+    args = parser.parse_args()
 
-    config = get_config()
+    # Apply mode preset, explicit disable flag still takes precedence
+    for option, value in MODE_PRESETS[args.mode].items():
+        setattr(args, option, value)
+    if args.disable_face_detection:
+        args.enable_face_detection = False
 
-    arduino_controller = None
-    camera_manager = None
-    api_server = None
-    face_tracker = None
+    return args
 
+def init_arduino(args, config):
+    """Initialize Arduino controller, returns None if disabled or failed"""
     # Initialize Arduino controller (if --no-arduino is not specified)
-    if not args.no_arduino:
-        try:
-            arduino_controller = ArduinoController(
-                port=config.get('arduino', 'port'),
-                baud_rate=config.get('arduino', 'baud_rate', 9600)
-            )
-            logger.info("Arduino controller initialized successfully")
-        except Exception as e:
-            logger.warning(f"Arduino initialization failed: {e}")
-    else:
+    if args.no_arduino:
         logger.info("Running in camera-only mode, not using Arduino controller")
+        return None
+
+    try:
+        arduino_controller = ArduinoController(
+            port=config.get('arduino', 'port'),
+            baud_rate=config.get('arduino', 'baud_rate', 9600)
+        )
+        logger.info("Arduino controller initialized successfully")
+        return arduino_controller
+    except Exception as e:
+        logger.warning(f"Arduino initialization failed: {e}")
+        return None
 
-    # Initialize camera manager
+def init_camera(args, config):
+    """Initialize camera manager, returns None if failed"""
     try:
         # Decide whether to enable AI face recognition, command line parameters take precedence over config file
         enable_ai_detection_config = config.get('camera', 'enable_ai_face_detection', False)
@@ -94,11 +131,34 @@ def setup(args):
             use_picamera=config.get('camera', 'use_picamera', True),
             enable_ai_face_detection=final_enable_ai_detection, # Use the final determined value
             cascade_path=config.get('camera', 'cascade_path', 'models/haarcascade_frontalface_default.xml'),
-            tflite_model_path=config.get('camera', 'tflite_model_path', 'models/frontal_face_classifier.tflite')
+            tflite_model_path=config.get('camera', 'tflite_model_path', 'models/frontal_face_classifier.tflite'),
+            face_detector_model_path=config.get('camera', 'face_detector_model_path'),
+            hardware_jpeg=config.get('camera', 'hardware_jpeg', False),
+            use_opencl=config.get('camera', 'use_opencl', False),
+            draw_timestamp=config.get('camera', 'draw_timestamp', True),
+            pin_threads=args.pin_threads or config.get('camera', 'pin_threads', False)
         )
         logger.info("Camera manager initialized successfully")
+        return camera_manager
     except Exception as e:
         logger.warning(f"Camera initialization failed: {e}")
+        return None
+
+def setup(args):
+    """Initialize system components"""
+    logger.info("Baby Intelligent Monitoring System starting...")
+
+    config = get_config()
+
+    face_tracker = None
+
+    # Initialize Arduino controller and camera manager in parallel,
+    # both spend most of their time waiting on hardware (board reset, camera warm-up)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        arduino_future = executor.submit(init_arduino, args, config)
+        camera_future = executor.submit(init_camera, args, config)
+        arduino_controller = arduino_future.result()
+        camera_manager = camera_future.result()
 
     # Initialize auto face tracker (if enabled)
     if args.enable_face_tracker and camera_manager and arduino_controller:
@@ -108,7 +168,12 @@ def setup(args):
                 arduino_controller=arduino_controller,
                 scan_interval=config.get('face_tracker', 'scan_interval', 3.0),
                 movement_delay=config.get('face_tracker', 'movement_delay', 2.0),
-                face_detection_threshold=config.get('face_tracker', 'face_detection_threshold', 3)
+                face_detection_threshold=config.get('face_tracker', 'face_detection_threshold', 3),
+                min_face_size=config.get('face_tracker', 'min_face_size', [40, 40]),
+                max_face_size=config.get('face_tracker', 'max_face_size', [200, 200]),
+                scale_factor=config.get('face_tracker', 'scale_factor', 1.3),
+                center_roi=config.get('face_tracker', 'center_roi', True),
+                pin_thread=camera_manager.pin_threads
             )
             logger.info("Auto face tracker initialized successfully")
         except Exception as e:
@@ -123,8 +188,9 @@ def setup(args):
     api_server_instance = APIServer(
         arduino_controller=arduino_controller,
         camera_manager=camera_manager,
-        host=config.get('server', 'host', '0.0.0.0'),
-        port=config.get('server', 'port', 5000)
+        host=args.host or config.get('server', 'host', '0.0.0.0'),
+        port=args.port or config.get('server', 'port', 5000),
+        debug=args.debug
     )
     logger.info("API server object created successfully")
 
@@ -175,8 +241,10 @@ def main():
                 )
                 camera.start_debug_window("Camera Test")
                 print("Press ESC key to exit")
-                while True:
-                    time.sleep(0.1)
+                # Block until Ctrl+C instead of waking up periodically
+                stop_event = threading.Event()
+                signal.signal(signal.SIGINT, lambda sig, frame: stop_event.set())
+                stop_event.wait()
             except KeyboardInterrupt:
                 pass
             except Exception as e:
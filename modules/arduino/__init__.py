@@ -10,8 +10,9 @@ Provides Arduino controller classes and other related classes
 # Export main controller
 from .controller import ArduinoController
 
-# Export base controller
+# Export base controller and serial connection
 from .base_controller import BaseArduinoController
+from .serial_connection import SerialConnection
 
 # Export specialized controllers
 from .bed_controller import BedController
@@ -20,6 +21,7 @@ from .heart_rate_controller import HeartRateController
 __all__ = [
     'ArduinoController',
     'BaseArduinoController', 
+    'SerialConnection',
     'BedController',
     'HeartRateController'
 ] 
\ No newline at end of file
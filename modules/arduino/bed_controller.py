@@ -6,14 +6,99 @@ Bed Controller Module - Responsible for controlling baby bed lifting, supports i
 """
 
 import logging
+import threading
+import time
 from .base_controller import BaseArduinoController
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Bed commands, encoded and newline-terminated once at import
+BED_COMMANDS = {
+    name: (name + "\n").encode("ascii")
+    for name in (
+        "UP", "DOWN", "STOP",
+        "LEFT_UP", "LEFT_DOWN", "LEFT_STOP",
+        "RIGHT_UP", "RIGHT_DOWN", "RIGHT_STOP",
+        "GET_STATUS",
+    )
+}
+
+# Named constants for the send paths, a global load instead of a dict lookup per command
+UP_COMMAND = BED_COMMANDS["UP"]
+DOWN_COMMAND = BED_COMMANDS["DOWN"]
+STOP_COMMAND = BED_COMMANDS["STOP"]
+LEFT_UP_COMMAND = BED_COMMANDS["LEFT_UP"]
+LEFT_DOWN_COMMAND = BED_COMMANDS["LEFT_DOWN"]
+LEFT_STOP_COMMAND = BED_COMMANDS["LEFT_STOP"]
+RIGHT_UP_COMMAND = BED_COMMANDS["RIGHT_UP"]
+RIGHT_DOWN_COMMAND = BED_COMMANDS["RIGHT_DOWN"]
+RIGHT_STOP_COMMAND = BED_COMMANDS["RIGHT_STOP"]
+GET_STATUS_COMMAND = BED_COMMANDS["GET_STATUS"]
+
+# Confirmed action -> (left status, right status), None keeps the current status
+_ACTION_STATUS = {
+    "UP": ("up", "up"),
+    "DOWN": ("down", "down"),
+    "STOP": ("stopped", "stopped"),
+    "LEFT_UP": ("up", None),
+    "LEFT_DOWN": ("down", None),
+    "LEFT_STOP": ("stopped", None),
+    "RIGHT_UP": (None, "up"),
+    "RIGHT_DOWN": (None, "down"),
+    "RIGHT_STOP": (None, "stopped"),
+}
+
+# Stop commands are always sent, even when repeated
+_STOP_COMMANDS = frozenset((STOP_COMMAND, LEFT_STOP_COMMAND, RIGHT_STOP_COMMAND))
+
+# Left/right commands that may be held back briefly to merge with the other side
+_SIDE_COMMANDS = frozenset(BED_COMMANDS[name] for name in BED_COMMANDS if name.startswith(("LEFT_", "RIGHT_")))
+
+# Adjacent left/right commands (in either order) -> equivalent whole bed command
+_PAIRED_COMMANDS = {}
+for _action in ("UP", "DOWN", "STOP"):
+    _left, _right = BED_COMMANDS["LEFT_" + _action], BED_COMMANDS["RIGHT_" + _action]
+    _PAIRED_COMMANDS[(_left, _right)] = _PAIRED_COMMANDS[(_right, _left)] = BED_COMMANDS[_action]
+del _action, _left, _right
+
+def _collapse(commands):
+    """
+    Merge adjacent left/right command pairs into the whole bed command, e.g.
+    [b"LEFT_UP\n", b"RIGHT_UP\n"] -> [b"UP\n"], halving the bytes on the wire
+    
+    Args:
+        commands (list): Encoded commands queued between two writes, in order
+    
+    Returns:
+        list: Commands to send, other commands keep their order
+    """
+    collapsed = []
+    i = 0
+    count = len(commands)
+    while i < count:
+        if i + 1 < count:
+            merged = _PAIRED_COMMANDS.get((commands[i], commands[i + 1]))
+            if merged is not None:
+                collapsed.append(merged)
+                i += 2
+                continue
+        collapsed.append(commands[i])
+        i += 1
+    return collapsed
+
 class BedController(BaseArduinoController):
     """Bed controller, supports whole bed control and independent left/right control"""
     
+    # Bed state lives in slots like the base class attributes, so instances carry no __dict__
+    # and the hot response handlers access it through C-level descriptors
+    __slots__ = (
+        "last_bed_response", "left_status", "right_status",
+        "_coalesce_window", "_last_command", "_last_command_time",
+        "_pair_window", "_pending_side", "_pending_deadline", "_send_lock", "_pending_cv",
+        "_flush_thread", "_closing",
+    )
+    
     def __init__(self, port, baud_rate=9600, timeout=1):
         """
         Initialize bed controller
@@ -27,46 +112,191 @@ class BedController(BaseArduinoController):
         self.last_bed_response = None
         self.left_status = "stopped"  # Left side status: "up", "down", "stopped"
         self.right_status = "stopped" # Right side status: "up", "down", "stopped"
+        
+        # Repeated identical movement commands within this window are dropped,
+        # e.g. auto-repeating UI buttons would otherwise saturate the serial line
+        self._coalesce_window = 0.05 # seconds
+        self._last_command = None
+        self._last_command_time = 0.0
+        
+        # A left/right command waits this long for the matching other side command,
+        # so left_up() followed by right_up() goes out as a single UP
+        self._pair_window = 0.002 # seconds
+        self._pending_side = None
+        self._pending_deadline = 0.0
+        # Held across taking the pending command and queueing it, so commands (STOP included)
+        # reach the send queue in call order; also guards _last_command/_last_command_time
+        self._send_lock = threading.Lock()
+        # Wakes the flush thread when a command is held or the controller closes
+        self._pending_cv = threading.Condition(self._send_lock)
+        self._flush_thread = None # Started with the first held command, one per controller
+        self._closing = False
     
-    def _handle_specific_response(self, response_line):
-        """Process bed-specific responses from Arduino"""
-        if response_line.startswith("CONFIRMED:"):
-            self.last_bed_response = response_line
-            logger.info(f"BedController confirmation: {response_line}")
-            
-            # Update internal status
-            action = response_line.replace("CONFIRMED:", "").strip()
-            self._update_bed_status(action)
-            
-        elif response_line.startswith("UNKNOWN_CMD:"):
-            logger.warning(f"BedController received unknown command reply: {response_line}")
-        elif "STATUS" in response_line:
-            logger.info(f"BedController status update: {response_line}")
-            # Can parse status information here if needed
+    def _get_response_handlers(self):
+        """Bed-specific response dispatch table, see BaseArduinoController._handle_specific_response"""
+        return {
+            "CONFIRMED": self._on_confirmed,
+            "UNKNOWN_CMD": self._on_unknown_command,
+            "STATUS": self._on_status,
+        }
+    
+    def _on_confirmed(self, action, response_line):
+        """Handle CONFIRMED:<action> responses"""
+        self.last_bed_response = response_line
+        logger.info("BedController confirmation: %s", response_line)
+        
+        # Update internal status
+        self._update_bed_status(action)
+    
+    def _on_unknown_command(self, command, response_line):
+        """Handle UNKNOWN_CMD:<command> responses"""
+        logger.warning("BedController received unknown command reply: %s", response_line)
+    
+    def _on_status(self, status, response_line):
+        """Handle STATUS:<fields> responses"""
+        logger.info("BedController status update: %s", response_line)
+        # Can parse status information here if needed
+    
+    def _handle_untagged_response(self, response_line):
+        """Process bed responses without a tag, e.g. "[STATUS] OK" from older firmware"""
+        if response_line.startswith("[STATUS]"):
+            self._on_status(response_line[8:].strip(), response_line)
     
     def _update_bed_status(self, action):
         """Update bed status based on confirmed action"""
-        if action == "UP":
-            self.left_status = "up"
-            self.right_status = "up"
-        elif action == "DOWN":
-            self.left_status = "down"
-            self.right_status = "down"
-        elif action == "STOP":
-            self.left_status = "stopped"
-            self.right_status = "stopped"
-        elif action == "LEFT_UP":
-            self.left_status = "up"
-        elif action == "LEFT_DOWN":
-            self.left_status = "down"
-        elif action == "LEFT_STOP":
-            self.left_status = "stopped"
-        elif action == "RIGHT_UP":
-            self.right_status = "up"
-        elif action == "RIGHT_DOWN":
-            self.right_status = "down"
-        elif action == "RIGHT_STOP":
-            self.right_status = "stopped"
+        left, right = _ACTION_STATUS.get(action, (None, None))
+        if left:
+            self.left_status = left
+        if right:
+            self.right_status = right
+    
+    def set_coalesce_window(self, seconds):
+        """
+        Set the window in which repeated identical commands are dropped
+        
+        Args:
+            seconds (float): Window length, 0 disables coalescing
+        """
+        self._coalesce_window = seconds
+    
+    def set_pair_window(self, seconds):
+        """
+        Set how long a left/right command waits to be merged with the other side
+        
+        Args:
+            seconds (float): Window length, 0 sends every command immediately
+        """
+        self._pair_window = seconds
+    
+    def _send_side(self, payload):
+        """
+        Send a left/right command, holding it for the pair window so that a matching
+        command for the other side can be merged into one whole bed command
+        
+        A held command is fire-and-forget: True means it was accepted while the port was
+        up and the send queue had room. If the port drops or the queue fills up within the
+        pair window, the command is dropped and the connection logs a warning.
+        
+        Args:
+            payload (bytes): Encoded LEFT_*/RIGHT_* command from BED_COMMANDS
+        
+        Returns:
+            bool: Whether the command was sent or accepted to be sent
+        """
+        if self._pair_window <= 0 or self._closing or not self.connection.can_send():
+            return self._send_coalesced(payload)
+        
+        with self._send_lock:
+            pending = self._pending_side
+            if pending is None:
+                self._pending_side = payload
+                self._pending_deadline = time.monotonic() + self._pair_window
+                if self._flush_thread is None:
+                    self._flush_thread = threading.Thread(target=self._flush_loop)
+                    self._flush_thread.daemon = True
+                    self._flush_thread.start()
+                self._pending_cv.notify()
+                return True
+            self._pending_side = None
+            
+            sent = True
+            for command in _collapse([pending, payload]):
+                sent = self._send_locked(command)
+            return sent
+    
+    def _flush_loop(self):
+        """Send held left/right commands whose pair window expired without the other side"""
+        with self._pending_cv:
+            while not self._closing:
+                if self._pending_side is None:
+                    self._pending_cv.wait()
+                    continue
+                remaining = self._pending_deadline - time.monotonic()
+                if remaining > 0:
+                    self._pending_cv.wait(remaining)
+                    continue
+                self._send_pending_locked()
+    
+    def _send_pending_locked(self):
+        """Queue the held left/right command, if any (caller holds _send_lock)"""
+        pending = self._pending_side
+        if pending is None:
+            return
+        self._pending_side = None
+        self._send_locked(pending)
+    
+    def _send_coalesced(self, payload):
+        """
+        Send a bed command unless the same command was just sent
+        
+        Args:
+            payload (bytes): Encoded command from BED_COMMANDS
+        
+        Returns:
+            bool: Whether the command was sent (or is already on its way)
+        """
+        with self._send_lock:
+            # Keep the order of commands, a held left/right command goes first
+            self._send_pending_locked()
+            return self._send_locked(payload)
+    
+    def _send_locked(self, payload):
+        """
+        Queue a bed command unless the same command was just sent (caller holds _send_lock)
+        
+        Args:
+            payload (bytes): Encoded command from BED_COMMANDS
+        
+        Returns:
+            bool: Whether the command was sent (or is already on its way)
+        """
+        now = time.monotonic()
+        if (payload == self._last_command
+                and now - self._last_command_time < self._coalesce_window
+                and payload not in _STOP_COMMANDS):
+            return True
+        
+        self._log_send(payload)
+        sent = self._send_raw(payload)
+        if sent:
+            self._last_command = payload
+            self._last_command_time = now
+        return sent
+    
+    def close(self):
+        """Send a still held left/right command and stop the flush thread, then close"""
+        with self._pending_cv:
+            self._send_pending_locked()
+            self._closing = True
+            self._pending_cv.notify()
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            self._flush_thread.join(timeout=1)
+        super().close()
+    
+    def _log_send(self, payload):
+        """Log an outgoing bed command, decoding it only if INFO is enabled"""
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Sending bed command %s", payload.decode("ascii").strip())
     
     # --------- Whole Bed Control Methods ---------
     
@@ -77,8 +307,7 @@ class BedController(BaseArduinoController):
         Returns:
             bool: Whether the command was sent
         """
-        logger.info("Sending whole bed up command UP")
-        return self.send_command("UP")
+        return self._send_coalesced(UP_COMMAND)
     
     def bed_down(self):
         """
@@ -87,8 +316,7 @@ class BedController(BaseArduinoController):
         Returns:
             bool: Whether the command was sent
         """
-        logger.info("Sending whole bed down command DOWN")
-        return self.send_command("DOWN")
+        return self._send_coalesced(DOWN_COMMAND)
     
     def bed_stop(self):
         """
@@ -97,8 +325,7 @@ class BedController(BaseArduinoController):
         Returns:
             bool: Whether the command was sent
         """
-        logger.info("Sending whole bed stop command STOP")
-        return self.send_command("STOP")
+        return self._send_coalesced(STOP_COMMAND)
     
     # --------- Left Side Control Methods ---------
     
@@ -109,8 +336,7 @@ class BedController(BaseArduinoController):
         Returns:
             bool: Whether the command was sent
         """
-        logger.info("Sending left side up command LEFT_UP")
-        return self.send_command("LEFT_UP")
+        return self._send_side(LEFT_UP_COMMAND)
     
     def left_down(self):
         """
@@ -119,8 +345,7 @@ class BedController(BaseArduinoController):
         Returns:
             bool: Whether the command was sent
         """
-        logger.info("Sending left side down command LEFT_DOWN")
-        return self.send_command("LEFT_DOWN")
+        return self._send_side(LEFT_DOWN_COMMAND)
     
     def left_stop(self):
         """
@@ -129,8 +354,7 @@ class BedController(BaseArduinoController):
         Returns:
             bool: Whether the command was sent
         """
-        logger.info("Sending left side stop command LEFT_STOP")
-        return self.send_command("LEFT_STOP")
+        return self._send_side(LEFT_STOP_COMMAND)
     
     # --------- Right Side Control Methods ---------
     
@@ -141,8 +365,7 @@ class BedController(BaseArduinoController):
         Returns:
             bool: Whether the command was sent
         """
-        logger.info("Sending right side up command RIGHT_UP")
-        return self.send_command("RIGHT_UP")
+        return self._send_side(RIGHT_UP_COMMAND)
     
     def right_down(self):
         """
@@ -151,8 +374,7 @@ class BedController(BaseArduinoController):
         Returns:
             bool: Whether the command was sent
         """
-        logger.info("Sending right side down command RIGHT_DOWN")
-        return self.send_command("RIGHT_DOWN")
+        return self._send_side(RIGHT_DOWN_COMMAND)
     
     def right_stop(self):
         """
@@ -161,8 +383,7 @@ class BedController(BaseArduinoController):
         Returns:
             bool: Whether the command was sent
         """
-        logger.info("Sending right side stop command RIGHT_STOP")
-        return self.send_command("RIGHT_STOP")
+        return self._send_side(RIGHT_STOP_COMMAND)
     
     # --------- Status Methods ---------
     
@@ -186,10 +407,19 @@ class BedController(BaseArduinoController):
         """
         Get current bed height (kept for compatibility with old API)
         
+        Returns the status tracked from Arduino's confirmations without sending anything,
+        so polling it doesn't flood the serial line. Use refresh_status() to query Arduino.
+        
         Returns:
             dict: Dictionary containing bed status information
         """
-        logger.debug("Getting bed status")
-        # Send GET_STATUS command to get latest status
-        self.send_command("GET_STATUS")
-        return self.get_bed_status() 
\ No newline at end of file
+        return self.get_bed_status()
+    
+    def refresh_status(self):
+        """
+        Ask Arduino for its current status, the reply updates the tracked bed status
+        
+        Returns:
+            bool: Whether the command was sent
+        """
+        return self._send_coalesced(GET_STATUS_COMMAND) 
\ No newline at end of file
@@ -6,13 +6,22 @@ Arduino Controller Module - Integrates bed control and heart rate monitoring fun
 """
 
 import logging
+import os
 from .bed_controller import BedController
 from .heart_rate_controller import HeartRateController
+from .serial_connection import SerialConnection
 from utils.device_discovery import discover_arduino_device
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Methods exposed directly from the specialized controllers
+BED_METHODS = ("bed_up", "bed_down", "bed_stop",
+               "left_up", "left_down", "left_stop",
+               "right_up", "right_down", "right_stop",
+               "get_bed_status", "refresh_status")
+HEART_RATE_METHODS = ("get_heart_rate", "subscribe_heart_rate", "unsubscribe_heart_rate")
+
 class ArduinoController:
     """
     Arduino Controller Class, integrates bed control and heart rate monitoring functions
@@ -26,10 +35,15 @@ class ArduinoController:
         Initialize Arduino controller
         
         Args:
-            port (str, optional): Serial port, if None will auto-discover
+            port (str, optional): Serial port, if None uses the ARDUINO_PORT environment
+                variable or, if that isn't set either, auto-discovers
             baud_rate (int): Baud rate
             timeout (float): Read timeout (seconds)
         """
+        # A port configured in the environment skips the scan entirely
+        if port is None:
+            port = os.environ.get('ARDUINO_PORT') or None
+        
         # If no port specified, try auto-discovery
         if port is None:
             port = discover_arduino_device(baud_rate)
@@ -39,143 +53,29 @@ class ArduinoController:
                 logger.warning("No Arduino device found, will use simulated device")
                 port = "/dev/ttyNONEXISTENT"  # Use non-existent port, controller will enter offline mode
         
-        # Create specialized controllers
-        self.bed_controller = BedController(port, baud_rate, timeout)
-        self.heart_rate_controller = HeartRateController(port, baud_rate, timeout)
-        
-        # Controller connection status
-        self.is_connected = (self.bed_controller.is_connected and 
-                            self.heart_rate_controller.is_connected)
-    
-    # --------- Bed Control Related Methods ---------
-    
-    def bed_up(self):
-        """
-        Raise the entire bed
-        
-        Returns:
-            bool: Whether the command was sent
-        """
-        return self.bed_controller.bed_up()
-    
-    def bed_down(self):
-        """
-        Lower the entire bed
-        
-        Returns:
-            bool: Whether the command was sent
-        """
-        return self.bed_controller.bed_down()
-    
-    def bed_stop(self):
-        """
-        Stop all bed movement
+        # Open the port once and share it, two handles on the same tty would steal each other's bytes
+        self.connection = SerialConnection(port, baud_rate, timeout, exclusive=True)
         
-        Returns:
-            bool: Whether the command was sent
-        """
-        return self.bed_controller.bed_stop()
-    
-    def left_up(self):
-        """
-        Raise the left side of the bed
-        
-        Returns:
-            bool: Whether the command was sent
-        """
-        return self.bed_controller.left_up()
-    
-    def left_down(self):
-        """
-        Lower the left side of the bed
-        
-        Returns:
-            bool: Whether the command was sent
-        """
-        return self.bed_controller.left_down()
-    
-    def left_stop(self):
-        """
-        Stop left side bed movement
-        
-        Returns:
-            bool: Whether the command was sent
-        """
-        return self.bed_controller.left_stop()
-    
-    def right_up(self):
-        """
-        Raise the right side of the bed
-        
-        Returns:
-            bool: Whether the command was sent
-        """
-        return self.bed_controller.right_up()
-    
-    def right_down(self):
-        """
-        Lower the right side of the bed
-        
-        Returns:
-            bool: Whether the command was sent
-        """
-        return self.bed_controller.right_down()
-    
-    def right_stop(self):
-        """
-        Stop right side bed movement
-        
-        Returns:
-            bool: Whether the command was sent
-        """
-        return self.bed_controller.right_stop()
-    
-    def get_bed_status(self):
-        """
-        Get current bed status
-        
-        Returns:
-            dict: Bed status information
-        """
-        return self.bed_controller.get_bed_status()
-    
-    def get_bed_height(self):
-        """
-        Get current bed height (kept for compatibility with old API)
-        
-        Returns:
-            dict: Bed status information
-        """
-        return self.get_bed_status()
-    
-    # --------- Heart Rate Monitoring Related Methods ---------
-    
-    def get_heart_rate(self):
-        """
-        Get current heart rate
-        
-        Returns:
-            int or None: Current heart rate, or None if unknown
-        """
-        return self.heart_rate_controller.get_heart_rate()
-    
-    def subscribe_heart_rate(self, callback):
-        """
-        Subscribe to heart rate data
-        
-        Args:
-            callback (callable): Callback function to call when new heart rate data is received, with heart rate as parameter
-        """
-        self.heart_rate_controller.subscribe_heart_rate(callback)
-    
-    def unsubscribe_heart_rate(self, callback):
-        """
-        Unsubscribe from heart rate data
-        
-        Args:
-            callback (callable): Previously registered callback function
-        """
-        self.heart_rate_controller.unsubscribe_heart_rate(callback)
+        # Create specialized controllers
+        self.bed_controller = BedController(self.connection)
+        self.heart_rate_controller = HeartRateController(self.connection)
+        
+        # Bind the sub-controllers' methods onto this instance, so each call goes
+        # straight to the controller instead of through a forwarding wrapper
+        for name in BED_METHODS:
+            setattr(self, name, getattr(self.bed_controller, name))
+        for name in HEART_RATE_METHODS:
+            setattr(self, name, getattr(self.heart_rate_controller, name))
+        # get_bed_height is kept for compatibility with the old API and only reads the cached status
+        self.get_bed_height = self.bed_controller.get_bed_status
+        
+        # Connect after both controllers listen, so no response is missed
+        self.connection.connect()
+    
+    @property
+    def is_connected(self):
+        """bool: Whether the shared serial connection to Arduino is currently up"""
+        return self.connection.is_connected
     
     # --------- General Methods ---------
     
@@ -183,6 +83,7 @@ class ArduinoController:
         """Close all controller connections"""
         self.bed_controller.close()
         self.heart_rate_controller.close()
+        self.connection.close()
     
     def get_system_status(self):
         """
@@ -6,16 +6,30 @@ Heart Rate Controller Module - Responsible for obtaining and processing baby hea
 """
 
 import logging
+import re
 import threading
-import time
 from .base_controller import BaseArduinoController
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Heart rate request, encoded and newline-terminated once at import
+GET_HEART_RATE_COMMAND = b"GET_HEART_RATE\n"
+
+# Heart rate in untagged responses, found in one scan: either a "[BPM] 72" / "[HEART] 72"
+# line prefix (groups 1-2), or a "HEART_RATE=72" / "HEART=72" field inside another
+# response with the value up to the next comma (group 3)
+_UNTAGGED_RATE_RE = re.compile(r"^(\[(?:BPM|HEART)\])(.*)|HEART(?:_RATE)?=([^,]*)")
+
 class HeartRateController(BaseArduinoController):
     """Simplified heart rate monitor that periodically requests and processes simple responses"""
     
+    __slots__ = (
+        "current_heart_rate", "last_heart_rate_response", "_subscribers", "_subscribers_lock",
+        "_monitoring_thread", "_stop_monitoring", "consecutive_failures", "max_failures",
+        "monitoring_interval", "max_monitoring_interval", "reply_timeout", "_reply_event",
+    )
+    
     def __init__(self, port, baud_rate=9600, timeout=1):
         """
         Initialize heart rate controller
@@ -28,88 +42,84 @@ class HeartRateController(BaseArduinoController):
         super().__init__(port, baud_rate, timeout)
         self.current_heart_rate = None
         self.last_heart_rate_response = None
-        self._subscribers = []
+        self._subscribers = () # Immutable, replaced on change (copy-on-write) so notifying needs no lock
+        self._subscribers_lock = threading.Lock() # Serializes subscribe/unsubscribe only
         self._monitoring_thread = None
         self._stop_monitoring = threading.Event() # Event to signal thread to stop
         self.consecutive_failures = 0
         self.max_failures = 5
         self.monitoring_interval = 10 # seconds
+        self.max_monitoring_interval = 60 # seconds, upper bound while backing off after failures
+        self.reply_timeout = 0.5 # seconds get_heart_rate waits for Arduino's reply
+        self._reply_event = threading.Event() # Set whenever a new heart rate value arrives
+    
+    def _accepts_response(self, response_line):
+        """Only heart rate related lines, so bed confirmations don't count as failed heart rate replies"""
+        return ("HEART" in response_line
+                or response_line.startswith("[BPM]")
+                or response_line == "UNKNOWN_CMD:GET_HEART_RATE")
+    
+    def _get_response_handlers(self):
+        """Heart rate specific response dispatch table, see BaseArduinoController._handle_specific_response"""
+        return {
+            "HEART_RATE_DATA": self._on_heart_rate_data,
+            "UNKNOWN_CMD": self._on_unknown_command,
+        }
+    
+    def _on_heart_rate_data(self, rate_str, response_line):
+        """Handle HEART_RATE_DATA:<bpm> responses"""
+        logger.debug("Processing heart rate response: '%s'", response_line)
+        try:
+            self._update_heart_rate(int(rate_str), response_line)
+            logger.info(f"Heart rate updated: {self.current_heart_rate} BPM")
+        except ValueError as e:
+            logger.warning(f"Failed to parse heart rate data '{response_line}': {e}")
+            self.consecutive_failures += 1
+    
+    def _on_unknown_command(self, command, response_line):
+        """Handle UNKNOWN_CMD:<command> responses"""
+        logger.warning(f"HeartRateController received unknown command reply: {response_line}")
+        self.consecutive_failures += 1
+        self._reply_event.set() # A reply too, get_heart_rate needn't wait out its timeout
     
-    def _handle_specific_response(self, response_line):
-        """Process heart rate specific responses from Arduino"""
-        logger.debug(f"Processing heart rate response: '{response_line}'")
+    def _handle_untagged_response(self, response_line):
+        """Process heart rate responses without a registered tag ([BPM]/[HEART] lines, HEART_RATE=/HEART= status fields)"""
+        logger.debug("Processing heart rate response: '%s'", response_line)
         
-        # Try multiple possible response formats
-        if response_line.startswith("HEART_RATE_DATA:"):
-            try:
-                rate_str = response_line.split(":")[1].strip()
-                self.current_heart_rate = int(rate_str)
-                self.last_heart_rate_response = response_line
-                self.consecutive_failures = 0 # Reset failures on successful response
-                logger.info(f"Heart rate updated: {self.current_heart_rate} BPM")
-                self._notify_subscribers(self.current_heart_rate)
-            except (IndexError, ValueError) as e:
-                logger.warning(f"Failed to parse heart rate data '{response_line}': {e}")
-                self.consecutive_failures += 1
-        # Check other possible response formats (e.g., [BPM] format)
-        elif response_line.startswith("[BPM]"):
+        match = _UNTAGGED_RATE_RE.search(response_line)
+        rate_format, prefixed_rate, field_rate = match.groups() if match else (None, None, None)
+        
+        # Check other possible response formats (e.g., [BPM] or [HEART] format)
+        if rate_format is not None:
             try:
-                rate_str = response_line.replace("[BPM]", "").strip()
-                self.current_heart_rate = int(rate_str)
-                self.last_heart_rate_response = response_line
-                self.consecutive_failures = 0
-                logger.info(f"Detected [BPM] format heart rate: {self.current_heart_rate} BPM")
-                self._notify_subscribers(self.current_heart_rate)
-            except (ValueError) as e:
-                logger.warning(f"Failed to parse [BPM] format heart rate data '{response_line}': {e}")
+                self._update_heart_rate(int(prefixed_rate), response_line)
+                logger.info(f"Detected {rate_format} format heart rate: {self.current_heart_rate} BPM")
+            except ValueError as e:
+                logger.warning(f"Failed to parse {rate_format} format heart rate data '{response_line}': {e}")
                 self.consecutive_failures += 1
-        # New: Check [HEART] format
-        elif response_line.startswith("[HEART]"):
+            return
+        
+        # If it's another response, try to find heart rate data in the response
+        logger.debug("HeartRateController received unexpected response: %s", response_line)
+        
+        # Heart rate data patterns - e.g., "HEART_RATE=XX" or "HEART=XX" (for STATUS responses)
+        if field_rate is not None:
             try:
-                rate_str = response_line.replace("[HEART]", "").strip()
-                self.current_heart_rate = int(rate_str)
-                self.last_heart_rate_response = response_line
-                self.consecutive_failures = 0
-                logger.info(f"Detected [HEART] format heart rate: {self.current_heart_rate} BPM")
-                self._notify_subscribers(self.current_heart_rate)
-            except (ValueError) as e:
-                logger.warning(f"Failed to parse [HEART] format heart rate data '{response_line}': {e}")
-                self.consecutive_failures += 1
-        elif response_line.startswith("UNKNOWN_CMD:"):
-            logger.warning(f"HeartRateController received unknown command reply: {response_line}")
-            self.consecutive_failures += 1
-        else:
-            # If it's another response, try to find heart rate data in the response
-            logger.debug(f"HeartRateController received unexpected response: {response_line}")
-            
-            # Try to find heart rate data patterns - e.g., "HEART_RATE=XX" or "HEART=XX"
-            if "HEART_RATE=" in response_line:
-                try:
-                    parts = response_line.split("HEART_RATE=")
-                    rate_str = parts[1].split(",")[0].strip() if "," in parts[1] else parts[1].strip()
-                    self.current_heart_rate = int(rate_str)
-                    self.last_heart_rate_response = response_line
-                    self.consecutive_failures = 0
-                    logger.info(f"Extracted heart rate from status response: {self.current_heart_rate} BPM")
-                    self._notify_subscribers(self.current_heart_rate)
-                    return
-                except (IndexError, ValueError) as e:
-                    logger.warning(f"Failed to extract heart rate from status response '{response_line}': {e}")
-            # New: Check HEART= format (for STATUS responses)
-            elif "HEART=" in response_line:
-                try:
-                    parts = response_line.split("HEART=")
-                    rate_str = parts[1].split(",")[0].strip() if "," in parts[1] else parts[1].strip()
-                    self.current_heart_rate = int(rate_str)
-                    self.last_heart_rate_response = response_line
-                    self.consecutive_failures = 0
-                    logger.info(f"Extracted heart rate from status response: {self.current_heart_rate} BPM")
-                    self._notify_subscribers(self.current_heart_rate)
-                    return
-                except (IndexError, ValueError) as e:
-                    logger.warning(f"Failed to extract heart rate from status response '{response_line}': {e}")
-            
-            self.consecutive_failures += 1
+                self._update_heart_rate(int(field_rate), response_line)
+                logger.info(f"Extracted heart rate from status response: {self.current_heart_rate} BPM")
+                return
+            except ValueError as e:
+                logger.warning(f"Failed to extract heart rate from status response '{response_line}': {e}")
+        
+        self.consecutive_failures += 1
+    
+    def _update_heart_rate(self, heart_rate, response_line):
+        """Store a successfully parsed heart rate and notify subscribers"""
+        self.current_heart_rate = heart_rate
+        self.last_heart_rate_response = response_line
+        self.consecutive_failures = 0 # Reset failures on successful response
+        self._reply_event.set()
+        self._notify_subscribers(heart_rate)
     
     def _notify_subscribers(self, heart_rate):
         """
@@ -118,11 +128,12 @@ class HeartRateController(BaseArduinoController):
         Args:
             heart_rate (int): Heart rate value
         """
+        # The tuple is read once, (un)subscribing meanwhile replaces it without affecting this loop
         for callback in self._subscribers:
             try:
                 callback(heart_rate)
             except Exception as e:
-                logger.error(f"Error calling heart rate subscriber callback: {e}")
+                logger.error("Error calling heart rate subscriber callback: %s", e)
     
     def get_heart_rate(self):
         """Get current heart rate (will be updated by background thread)"""
@@ -130,11 +141,13 @@ class HeartRateController(BaseArduinoController):
         logger.info("Requesting heart rate data...")
         
         # Send command and ensure it was sent successfully
-        success = self.send_command("GET_HEART_RATE")
+        self._reply_event.clear()
+        success = self._send_raw(GET_HEART_RATE_COMMAND)
         if success:
             logger.info("GET_HEART_RATE command sent, waiting for response...")
-            # Wait a short time to receive response
-            time.sleep(0.5)
+            # Return as soon as the response is processed instead of always sleeping
+            if not self._reply_event.wait(self.reply_timeout):
+                logger.debug("No heart rate response within %s seconds", self.reply_timeout)
         else:
             logger.error("Failed to send GET_HEART_RATE command")
         
@@ -149,8 +162,9 @@ class HeartRateController(BaseArduinoController):
         Args:
             callback (callable): Callback function to call when new heart rate data is received, with heart rate as parameter
         """
-        if callback not in self._subscribers:
-            self._subscribers.append(callback)
+        with self._subscribers_lock:
+            if callback not in self._subscribers:
+                self._subscribers = self._subscribers + (callback,)
         self.start_monitoring() # Start monitoring when first subscriber is added
     
     def unsubscribe_heart_rate(self, callback):
@@ -160,8 +174,8 @@ class HeartRateController(BaseArduinoController):
         Args:
             callback (callable): Previously registered callback function
         """
-        if callback in self._subscribers:
-            self._subscribers.remove(callback)
+        with self._subscribers_lock:
+            self._subscribers = tuple(subscriber for subscriber in self._subscribers if subscriber != callback)
         if not self._subscribers: # Stop monitoring if no subscribers left
             self.stop_monitoring()
     
@@ -173,7 +187,7 @@ class HeartRateController(BaseArduinoController):
                 self.consecutive_failures +=1 # Increment failures if not connected
             else:
                 logger.debug("Heart rate monitoring: Sending GET_HEART_RATE command")
-                success = self.send_command("GET_HEART_RATE")
+                success = self._send_raw(GET_HEART_RATE_COMMAND)
                 if not success:
                     self.consecutive_failures += 1
                 # Response processing and failure counting will happen in _handle_specific_response
@@ -183,8 +197,11 @@ class HeartRateController(BaseArduinoController):
                 self.stop_monitoring() # This will set the event and loop will exit
                 break # Exit loop immediately
 
-            # Wait for the next interval, checking the stop event frequently
-            self._stop_monitoring.wait(self.monitoring_interval)
+            # Back off while Arduino isn't answering, the regular interval resumes after a valid reply
+            interval = min(self.monitoring_interval * (1 + self.consecutive_failures), self.max_monitoring_interval)
+            
+            # Wait for the next interval, returns immediately when monitoring is stopped
+            self._stop_monitoring.wait(interval)
         logger.info("Heart rate monitoring loop has stopped.")
 
     def start_monitoring(self):
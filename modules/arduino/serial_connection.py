@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Serial Connection Module - Owns the serial port to Arduino and its I/O threads
+"""
+
+import array
+import collections
+import fcntl
+import logging
+import os
+import queue
+import selectors
+import serial
+import termios
+import threading
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class SerialConnection:
+    """
+    Serial connection to Arduino, the single owner of the port
+    
+    One I/O thread reads lines and writes queued commands, a second thread hands
+    received lines to the registered listeners (e.g., controllers), so slow
+    listeners never stall the serial port. Commands are passed in through a queue.
+    """
+    
+    def __init__(self, port, baud_rate=9600, timeout=1, min_write_interval=0.0, reset_delay=2.0, exclusive=None):
+        """
+        Initialize serial connection (call connect() to open the port)
+        
+        Args:
+            port (str): Serial port (e.g., '/dev/ttyUSB0')
+            baud_rate (int): Baud rate
+            timeout (float): Read timeout (seconds)
+            min_write_interval (float): Minimum pause after each serial write (seconds),
+                only needed for firmware that cannot keep up with back-to-back commands
+            reset_delay (float): Time to wait for the board to reset after first opening the port (seconds)
+            exclusive (bool): Lock the port so no other process (or controller) can open it, POSIX only.
+                None keeps pyserial's default (no lock)
+        """
+        self.port = port
+        self.baud_rate = baud_rate
+        self.timeout = timeout
+        self.min_write_interval = min_write_interval
+        self.reset_delay = reset_delay
+        self.exclusive = exclusive
+        self.serial = None
+        self.is_connected = False
+        self.io_thread = None
+        self.response_thread = None
+        self.running = False
+        self._closed = False
+        
+        # Callables receiving each response line, immutable tuple replaced on change
+        self._listeners = ()
+        
+        # Command queue (deque append/popleft are thread-safe, no extra locking needed)
+        self.command_queue = collections.deque()
+        # Makes send_raw's connected check, append and wake-up atomic with respect to close(),
+        # so nothing is queued (or written to a closed wake-up pipe) once closing has begun
+        self._send_lock = threading.Lock()
+        self.max_queued_commands = 64 # Callers get False instead of piling up commands if the port stalls
+        
+        # Pipe used to wake up the I/O loop when commands are queued or on close
+        self._wake_r = None
+        self._wake_w = None
+        
+        # Bytes received from Arduino that don't form a complete line yet
+        self._rx_buf = bytearray()
+        
+        # Received lines waiting to be processed, keeps parsing off the read thread
+        # (SimpleQueue is implemented in C without the Condition bookkeeping of queue.Queue,
+        # one producer and one consumer need nothing more)
+        self.response_queue = queue.SimpleQueue()
+    
+    def add_listener(self, callback):
+        """
+        Register a callable receiving each response line from Arduino
+        
+        Args:
+            callback (callable): Called with the response line (str)
+        """
+        if callback not in self._listeners:
+            self._listeners = self._listeners + (callback,)
+    
+    def remove_listener(self, callback):
+        """
+        Unregister a response line listener
+        
+        Args:
+            callback (callable): Previously registered callable
+        """
+        self._listeners = tuple(listener for listener in self._listeners if listener != callback)
+    
+    def connect(self, wait_for_reset=True):
+        """
+        Try to connect to Arduino
+        
+        Args:
+            wait_for_reset (bool): Whether to wait reset_delay seconds for the board to reset
+        
+        Returns:
+            bool: Whether the connection was established
+        """
+        try:
+            self.serial = serial.Serial(
+                port=self.port,
+                baudrate=self.baud_rate,
+                timeout=self.timeout,
+                dsrdtr=False, # No hardware handshaking, avoids extra DTR/RTS toggling
+                rtscts=False,
+                exclusive=self.exclusive
+            )
+            # Note: pyserial already puts POSIX ports in raw mode (no canonical
+            # processing, echo or signal characters), so no extra termios setup is needed.
+            
+            # Ask the tty driver to deliver bytes immediately instead of batching them
+            # (FTDI adapters otherwise hold data for up to 16 ms). Not supported by every adapter/platform.
+            try:
+                self.serial.set_low_latency_mode(True) # TIOCGSERIAL/TIOCSSERIAL with ASYNC_LOW_LATENCY
+            except (IOError, ValueError, NotImplementedError, AttributeError) as e:
+                # Fall back to the usb-serial latency timer on Linux
+                if not self._set_latency_timer(1):
+                    logger.debug("Low latency mode not available on %s: %s", self.port, e)
+            
+            # For many Arduino boards, opening the serial port causes a reset.
+            # This delay gives the Arduino enough time to complete the reset and be ready to receive data.
+            # On reconnect the board is already initialized, so the wait is skipped.
+            if wait_for_reset and self.reset_delay > 0:
+                logger.info("Waiting for Arduino board reset and initialization (typically takes 1-2 seconds)...")
+                time.sleep(self.reset_delay)
+            
+            self.serial.flushInput() # Clear any initial data Arduino might have sent before Python was ready
+            self._rx_buf.clear() # Drop partial line left over from a previous connection
+            self.response_queue = queue.SimpleQueue() # Drop lines (and close sentinel) left over from a previous connection
+            
+            # Try to read Arduino's initial ready message (optional)
+            # This helps confirm two-way communication, but it's not a critical error if Arduino didn't send one or it was cleared by flushInput
+            try:
+                initial_message = self.serial.readline().decode('utf-8').strip()
+                if initial_message:
+                    logger.info(f"Received initial message from Arduino: {initial_message}")
+                else:
+                    logger.debug("No initial ready message received from Arduino (might have been cleared or not sent).")
+            except Exception as e:
+                logger.debug("Error reading initial message (can be ignored): %s", e)
+
+
+            logger.info(f"Connected to Arduino: {self.port}")
+            
+            # Start serial I/O thread (reads responses and sends commands)
+            self.running = True
+            wake_r, wake_w = os.pipe()
+            os.set_blocking(wake_r, False)
+            os.set_blocking(wake_w, False)
+            with self._send_lock:
+                # The wake-up pipe exists before send_raw can see the connection as up
+                self._wake_r, self._wake_w = wake_r, wake_w
+                self.is_connected = True
+                self._closed = False
+            self.io_thread = threading.Thread(target=self._io_loop)
+            self.io_thread.daemon = True
+            self.io_thread.start()
+            
+            # Start response processing thread
+            self.response_thread = threading.Thread(target=self._response_loop)
+            self.response_thread.daemon = True
+            self.response_thread.start()
+            
+            # Request system status, queued directly so connecting never waits on it
+            with self._send_lock:
+                self.command_queue.append(b"GET_STATUS\n")
+                self._wake_io_loop()
+            
+        except serial.SerialException as e:
+            logger.error(f"Could not connect to Arduino (port: {self.port}, baud rate: {self.baud_rate}): Detailed error: {e}")
+            self.is_connected = False
+        except Exception as ex:
+            logger.error(f"Unexpected error while connecting to Arduino (port: {self.port}): {ex}", exc_info=True)
+            self.is_connected = False
+        
+        if not self.is_connected:
+            # Let the next close() (e.g., from reconnect()) release whatever this attempt left open,
+            # otherwise a failed reconnect would leave close() a no-op forever
+            self._closed = False
+        
+        return self.is_connected
+    
+    def _set_latency_timer(self, milliseconds):
+        """
+        Set the USB-serial bridge latency timer through sysfs (Linux, FTDI-class adapters)
+        
+        Args:
+            milliseconds (int): How long the adapter may hold received bytes before forwarding them
+        
+        Returns:
+            bool: Whether the latency timer was set
+        """
+        device = os.path.basename(os.path.realpath(self.port)) # Resolve /dev/serial/by-id/... links
+        latency_timer = f"/sys/bus/usb-serial/devices/{device}/latency_timer"
+        try:
+            with open(latency_timer, "w") as f:
+                f.write(str(milliseconds))
+        except OSError:
+            return False
+        logger.debug("Set %s to %s ms", latency_timer, milliseconds)
+        return True
+    
+    def reconnect(self):
+        """
+        Reconnect to Arduino
+        
+        Returns:
+            bool: Whether the connection was re-established
+        """
+        # Always close, the I/O thread may have marked the connection as lost while
+        # the response thread is still waiting for its close sentinel
+        self.close()
+        return self.connect(wait_for_reset=False)
+    
+    def close(self):
+        """Close connection, calling it again is a no-op"""
+        with self._send_lock:
+            if self._closed:
+                return
+            self._closed = True
+            # From here on send_raw refuses commands and no longer touches the wake-up pipe
+            self.is_connected = False
+            wake_r, wake_w = self._wake_r, self._wake_w
+            self._wake_r = self._wake_w = None
+        
+        self.running = False
+        if wake_w is not None:
+            try:
+                os.write(wake_w, b'x') # Wake up the I/O thread so it can exit
+            except OSError:
+                pass
+        self.response_queue.put(None) # Sentinel, wakes up the response thread immediately
+        
+        # Interrupt any blocking read/write instead of waiting for the timeout
+        if self.serial and self.serial.is_open:
+            try:
+                self.serial.cancel_read()
+                self.serial.cancel_write()
+            except Exception:
+                pass
+        
+        if self.io_thread:
+            if self.io_thread.is_alive():
+                self.io_thread.join(timeout=1)
+        
+        if self.response_thread:
+            if self.response_thread.is_alive():
+                self.response_thread.join(timeout=1)
+        
+        if self.serial and self.serial.is_open:
+            self.serial.close()
+            logger.info("Arduino connection closed")
+        
+        # Only closed after the I/O thread is done with them
+        for fd in (wake_r, wake_w):
+            if fd is not None:
+                os.close(fd)
+    
+    def _io_loop(self):
+        """
+        Serial I/O loop - reads data from Arduino and sends queued commands.
+        Waits in the kernel on both the serial port and the wake-up pipe,
+        so one thread serves both directions.
+        """
+        # The serial object doesn't change during this thread's lifetime (reconnect
+        # starts a new thread), so bind hot attributes to locals once
+        ser = self.serial
+        if ser is None:
+            return
+        serial_fd = ser.fileno()
+        wake_fd = self._wake_r
+        read = os.read
+        ioctl = fcntl.ioctl
+        fionread = termios.FIONREAD
+        pending_bytes = array.array('i', [0]) # Filled in place by FIONREAD
+        write = ser.write
+        rx_buf = self._rx_buf
+        put_response = self.response_queue.put
+        command_queue = self.command_queue
+        min_write_interval = self.min_write_interval
+        sleep = time.sleep
+        monotonic = time.monotonic
+        next_write_time = 0.0
+        
+        selector = selectors.DefaultSelector()
+        selector.register(serial_fd, selectors.EVENT_READ)
+        selector.register(wake_fd, selectors.EVENT_READ)
+        
+        try:
+            while self.running and ser.is_open:
+                try:
+                    # Re-check running every second even without any events
+                    for key, _ in selector.select(timeout=1):
+                        if key.fd == wake_fd:
+                            os.read(wake_fd, 4096) # Clear wake-up bytes, commands are sent below
+                            continue
+                        
+                        # Take everything the driver has buffered in one read() straight
+                        # from the fd, bypassing pyserial's per-read select/timeout loop
+                        ioctl(serial_fd, fionread, pending_bytes, True)
+                        try:
+                            chunk = read(serial_fd, pending_bytes[0] or 1)
+                        except (BlockingIOError, InterruptedError):
+                            # Spurious wake-up on the non-blocking fd, nothing to read yet
+                            continue
+                        if not chunk:
+                            # Readable but no data means the device went away
+                            raise serial.SerialException("device reports readiness to read but returned no data (device disconnected?)")
+                        rx_buf.extend(chunk)
+                        
+                        # Split off all complete lines
+                        while b'\n' in rx_buf:
+                            raw_line, _, rest = rx_buf.partition(b'\n')
+                            rx_buf[:] = rest
+                            line = raw_line.decode('utf-8', 'replace').strip()
+                            if line:
+                                logger.debug("Raw received from Arduino: %s", line) # Add raw data log, formatted lazily
+                                put_response(line) # Hand the raw line over to the response thread
+                    
+                    if not command_queue:
+                        continue
+                    
+                    # Drain all queued commands so they go out in a single write
+                    # (queued commands are already encoded, including \n)
+                    encoded_command = command_queue.popleft()
+                    if command_queue:
+                        # Join once instead of re-concatenating the growing batch per command
+                        batch = [encoded_command]
+                        while command_queue:
+                            batch.append(command_queue.popleft())
+                        encoded_command = b''.join(batch)
+                    
+                    # Optional pacing for slow firmware, the UART itself provides back-pressure.
+                    # Only waits for what's left of the interval since the previous write.
+                    if min_write_interval > 0:
+                        now = monotonic()
+                        if now < next_write_time:
+                            sleep(next_write_time - now)
+                    
+                    write(encoded_command)
+                    if min_write_interval > 0:
+                        next_write_time = monotonic() + min_write_interval
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Command sent to Arduino: %s", encoded_command.decode('utf-8', 'replace').strip())
+                        logger.debug("Bytes sent: %s", encoded_command.hex(' '))
+                
+                except (serial.SerialException, OSError) as e:
+                    logger.error(f"Serial I/O error: {e}")
+                    self.is_connected = False
+                    break
+                except Exception as e:
+                    logger.error(f"Error in serial I/O loop: {e}")
+        finally:
+            selector.close()
+    
+    def _wake_io_loop(self):
+        """Wake up the I/O loop, e.g. to send newly queued commands"""
+        try:
+            os.write(self._wake_w, b'x')
+        except (TypeError, OSError):
+            # Pipe full means a wake-up is already pending; no pipe means not connected
+            pass
+    
+    def _response_loop(self):
+        """Response processing loop - get received lines from queue and pass them to the listeners"""
+        get_response = self.response_queue.get
+        while True:
+            # Blocks until a line arrives, close() puts a None sentinel to stop the loop,
+            # so idling costs no timeouts or queue.Empty exceptions
+            response_line = get_response()
+            if response_line is None:
+                break
+            
+            logger.info("Arduino response: %s", response_line) # Formatted only if INFO is enabled
+            for listener in self._listeners:
+                try:
+                    listener(response_line)
+                except Exception as e:
+                    logger.error(f"Error processing Arduino response '{response_line}': {e}")
+    
+    def can_send(self):
+        """
+        Whether a command would be accepted right now
+        
+        Returns:
+            bool: Whether the port is up and the send queue has room
+        """
+        return self.is_connected and len(self.command_queue) < self.max_queued_commands
+    
+    def send_raw(self, payload):
+        """
+        Send an already encoded, newline-terminated command to Arduino (fast path for constant commands).
+        
+        Args:
+            payload (bytes): Encoded command including the trailing newline (e.g., b"UP\n")
+        
+        Returns:
+            bool: Whether the command was successfully added to the send queue
+        """
+        with self._send_lock:
+            if not self.is_connected:
+                logger.warning(f"Arduino not connected, cannot send command: {payload.decode('utf-8', 'replace').strip()}")
+                return False
+            
+            if len(self.command_queue) >= self.max_queued_commands:
+                logger.warning(f"Send queue full ({self.max_queued_commands} commands), dropping command: {payload.decode('utf-8', 'replace').strip()}")
+                return False
+            
+            self.command_queue.append(payload) # Put encoded command in queue
+            self._wake_io_loop()
+        logger.debug("Command %r added to send queue.", payload)
+        return True
@@ -10,10 +10,21 @@ import threading
 import time
 import cv2
 import numpy as np
+from utils.cpu_affinity import pin_current_thread, TRACKING_CORE
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Frame width Haar detection runs at, presence/absence doesn't need full resolution
+DETECTION_WIDTH = 320
+
+# Frames whose 64-bit difference hash differs in fewer bits count as unchanged
+UNCHANGED_HASH_BITS = 3
+
+# BGR range of the green boxes the camera's AI overlay draws around front-facing faces
+OVERLAY_GREEN_LOW = np.array([0, 200, 0], dtype=np.uint8)
+OVERLAY_GREEN_HIGH = np.array([100, 255, 100], dtype=np.uint8)
+
 class AutoFaceTracker:
     """
     Auto Face Tracking Class, automatically adjusts bed position to recognize faces
@@ -23,7 +34,12 @@ class AutoFaceTracker:
                  scan_interval=3.0, 
                  movement_delay=2.0,
                  face_detection_threshold=3,
-                 adjustment_sequence=None):
+                 adjustment_sequence=None,
+                 min_face_size=(40, 40),
+                 max_face_size=(200, 200),
+                 scale_factor=1.3,
+                 center_roi=True,
+                 pin_thread=False):
         """
         Initialize auto face tracker
         
@@ -34,12 +50,27 @@ class AutoFaceTracker:
             movement_delay (float): Wait time after movement (seconds)
             face_detection_threshold (int): How many consecutive times without face detection before triggering adjustment
             adjustment_sequence (list): Custom adjustment sequence, if None uses default sequence
+            min_face_size (tuple): Smallest face (width, height) the Haar cascade looks for, in detection image pixels
+            max_face_size (tuple): Largest face (width, height) the Haar cascade looks for, in detection image pixels
+            scale_factor (float): Haar cascade pyramid step, larger means fewer scales to scan
+            center_roi (bool): Only look for faces in the center half of the frame, where the baby lies
+            pin_thread (bool): Pin the tracking thread to its own CPU core
         """
         self.camera_manager = camera_manager
         self.arduino_controller = arduino_controller
         self.scan_interval = scan_interval
         self.movement_delay = movement_delay
+        # Ring buffer of the last face_detection_threshold scan results (1 = face found),
+        # sized by the face_detection_threshold setter, which the API may call at runtime
+        self._history_lock = threading.Lock()
+        self._detection_history = np.ones(0, dtype=np.uint8)
+        self._history_index = 0
         self.face_detection_threshold = face_detection_threshold
+        self.min_face_size = tuple(min_face_size)
+        self.max_face_size = tuple(max_face_size)
+        self.scale_factor = scale_factor
+        self.center_roi = center_roi
+        self.pin_thread = pin_thread
         
         # Adjustment sequence: each element is a dictionary containing action and duration
         self.adjustment_sequence = adjustment_sequence or [
@@ -59,10 +90,68 @@ class AutoFaceTracker:
         
         self.is_running = False
         self.tracker_thread = None
+        self._stop_event = threading.Event() # Interrupts the waits between bed movements
+        
+        # Newest frame pushed by the camera once per scan interval, see _on_frame
+        self._frame_event = threading.Event()
+        self._latest_frame = None
+        self._last_scan_time = 0.0
+        self._overlay_mask = None # Reused inRange output, only the tracking thread touches it
+        self._prev_hash = None # Difference hash of the last Haar-scanned frame and its result
+        self._prev_result = False
         self.current_sequence_index = 0
-        self.no_face_count = 0
         self.last_face_detected = False
         
+        # Action name -> bound bed control method, built once instead of per action
+        self._action_methods = {}
+        if arduino_controller is not None:
+            self._action_methods = {
+                "up": arduino_controller.bed_up,
+                "down": arduino_controller.bed_down,
+                "stop": arduino_controller.bed_stop,
+                "left_up": arduino_controller.left_up,
+                "left_down": arduino_controller.left_down,
+                "left_stop": arduino_controller.left_stop,
+                "right_up": arduino_controller.right_up,
+                "right_down": arduino_controller.right_down,
+                "right_stop": arduino_controller.right_stop
+            }
+        
+        # Haar cascade for detection without the camera's AI overlay, parsing the XML
+        # takes far longer than a detection, so it is loaded once instead of per scan
+        self._face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        
+    @property
+    def face_detection_threshold(self):
+        """int: How many consecutive scans without a face trigger a bed adjustment"""
+        return self._face_detection_threshold
+    
+    @face_detection_threshold.setter
+    def face_detection_threshold(self, threshold):
+        # Resize the history, keeping the current run of misses so a lowered threshold
+        # applies from the next scan, like the old counter comparison did
+        history = np.ones(max(1, threshold), dtype=np.uint8) # Unknown scans count as faces
+        with self._history_lock:
+            misses = min(self.no_face_count, len(history))
+            if misses:
+                history[len(history) - misses:] = 0
+            self._face_detection_threshold = threshold
+            self._detection_history = history
+            self._history_index = 0
+    
+    @property
+    def no_face_count(self):
+        """int: Consecutive scans without a face, counted back from the latest scan (at most the history length)"""
+        history = self._detection_history
+        count = 0
+        index = self._history_index
+        for _ in range(len(history)):
+            index = (index - 1) % len(history)
+            if history[index]:
+                break
+            count += 1
+        return count
+    
     def start(self):
         """Start auto face tracking"""
         if self.is_running:
@@ -78,10 +167,16 @@ class AutoFaceTracker:
             return False
         
         self.is_running = True
+        self._stop_event.clear()
+        self._frame_event.clear()
+        self._last_scan_time = 0.0
         self.tracker_thread = threading.Thread(target=self._tracking_loop)
         self.tracker_thread.daemon = True
         self.tracker_thread.start()
         
+        # Scan frames as the camera delivers them instead of polling for one
+        self.camera_manager.register_client(self._on_frame)
+        
         logger.info("Auto face tracking started")
         return True
     
@@ -91,6 +186,9 @@ class AutoFaceTracker:
             return
         
         self.is_running = False
+        self.camera_manager.unregister_client(self._on_frame)
+        self._stop_event.set() # Wake the tracking thread instead of waiting out its sleep
+        self._frame_event.set()
         if self.tracker_thread and self.tracker_thread.is_alive():
             self.tracker_thread.join(timeout=2)
         
@@ -100,42 +198,71 @@ class AutoFaceTracker:
         
         logger.info("Auto face tracking stopped")
     
+    def _on_frame(self, frame):
+        """
+        Camera client callback, hands at most one frame per scan interval to the tracking thread
+        
+        Args:
+            frame: Video frame in BGR format (shared with other clients, not modified here)
+        """
+        now = time.monotonic()
+        if now - self._last_scan_time < self.scan_interval:
+            return
+        self._last_scan_time = now
+        self._latest_frame = frame
+        self._frame_event.set()
+    
     def _tracking_loop(self):
         """Face tracking main loop"""
         logger.info("Face tracking loop started")
+        if self.pin_thread:
+            pin_current_thread(TRACKING_CORE)
         
         while self.is_running:
             try:
-                # Get current frame and detect faces
-                frame = self.camera_manager.get_frame()
+                # Sleep until the camera delivers a fresh frame (or stop() wakes us),
+                # only frames actually captured are scanned, no repeated scans of a stale one
+                self._frame_event.wait()
+                self._frame_event.clear()
+                if not self.is_running:
+                    break
+                frame = self._latest_frame
                 faces_detected = self._detect_faces(frame)
-                
-                if faces_detected:
-                    # Face detected, reset counter
-                    self.no_face_count = 0
-                    if not self.last_face_detected:
-                        logger.info("Face detected")
-                        self.last_face_detected = True
-                else:
-                    # No face detected, increment counter
-                    self.no_face_count += 1
-                    if self.last_face_detected:
-                        logger.info("No face detected")
-                        self.last_face_detected = False
-                
-                # If multiple consecutive times without face detection, start adjusting bed position
-                if self.no_face_count >= self.face_detection_threshold:
-                    logger.info(f"No face detected for {self.no_face_count} consecutive scans, starting bed position adjustment")
-                    self._adjust_bed_position()
-                    # Reset counter
-                    self.no_face_count = 0
-                
-                # Wait for next scan
-                time.sleep(self.scan_interval)
+                self._record_detection(faces_detected)
                 
             except Exception as e:
                 logger.error(f"Error in face tracking loop: {e}")
-                time.sleep(1)
+                self._stop_event.wait(1)
+    
+    def _record_detection(self, faces_detected):
+        """
+        Record a scan result and adjust the bed once enough consecutive scans found no face
+        
+        Args:
+            faces_detected (bool): Whether the scan found a face
+        """
+        # Record the result in the history ring buffer
+        with self._history_lock:
+            history = self._detection_history
+            history[self._history_index] = faces_detected
+            self._history_index = (self._history_index + 1) % len(history)
+            no_face = not history.any()
+        
+        if faces_detected != self.last_face_detected:
+            logger.info("Face detected" if faces_detected else "No face detected")
+            self.last_face_detected = faces_detected
+        
+        # If the whole history is without face detection, start adjusting bed position
+        if no_face:
+            logger.info(f"No face detected for {len(history)} consecutive scans, starting bed position adjustment")
+            self._adjust_bed_position()
+            # Reset history, the next adjustment needs as many misses again
+            with self._history_lock:
+                self._detection_history.fill(1)
+            # Drop the frame captured while the bed was moving or settling and
+            # start the scan interval over, as start() does
+            self._last_scan_time = time.monotonic()
+            self._frame_event.clear()
     
     def _detect_faces(self, frame):
         """
@@ -153,33 +280,65 @@ class AutoFaceTracker:
         # If the camera has AI face detection enabled, we can determine by analyzing green rectangles in the frame
         # This is a simple method, assuming AI face detection draws green rectangles around detected faces
         if self.camera_manager.enable_ai_face_detection:
-            # Extract green channel
-            green_channel = frame[:, :, 1].copy()
-            
-            # Threshold processing to extract bright green areas
-            _, thresh = cv2.threshold(green_channel, 200, 255, cv2.THRESH_BINARY)
-            
-            # Find contours
-            contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            # If found contours are large enough, they might be green rectangles around faces
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if area > 100:  # Area threshold, can be adjusted based on actual conditions
-                    return True
-            
-            return False
+            # Count overlay-green pixels in one fused SIMD pass (no contours). Low blue and red
+            # keep white or bright areas from counting. The 2 px outline of even the smallest
+            # (30x30) face box has well over 100 of them. Not downsampled, striding could skip the thin outline.
+            # The mask is written into the previous scan's buffer, OpenCV only reallocates on a size change.
+            mask = self._overlay_mask = cv2.inRange(frame, OVERLAY_GREEN_LOW, OVERLAY_GREEN_HIGH, dst=self._overlay_mask)
+            return cv2.countNonZero(mask) > 100  # Pixel threshold, can be adjusted based on actual conditions
         else:
             # If AI face detection is not enabled, use OpenCV's Haar cascade classifier
             try:
+                if self.center_roi:
+                    # View of the center half, no copy
+                    height, width = frame.shape[:2]
+                    frame = frame[height // 4:3 * height // 4, width // 4:3 * width // 4]
+                
+                # Static scene (sleeping baby): reuse the last result instead of running the cascade
+                frame_hash = self._frame_hash(frame)
+                if (self._prev_hash is not None
+                        and bin(frame_hash ^ self._prev_hash).count('1') < UNCHANGED_HASH_BITS):
+                    return self._prev_result
+                
+                # Downsample first so conversion and every pyramid level touch fewer pixels
+                height, width = frame.shape[:2]
+                if self.camera_manager.use_opencl:
+                    # Resize, conversion and cascade run on the camera's OpenCL device
+                    frame = cv2.UMat(frame)
+                if width > DETECTION_WIDTH:
+                    scale = DETECTION_WIDTH / width
+                    frame = cv2.resize(frame, (DETECTION_WIDTH, int(height * scale)), interpolation=cv2.INTER_AREA)
                 gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-                faces = face_cascade.detectMultiScale(gray, 1.1, 5)
-                return len(faces) > 0
+                # Presence is all that matters: coarse pyramid bounded to plausible face sizes
+                faces = self._face_cascade.detectMultiScale(
+                    gray,
+                    scaleFactor=self.scale_factor,
+                    minNeighbors=4,
+                    minSize=self.min_face_size,
+                    maxSize=self.max_face_size
+                )
+                self._prev_hash = frame_hash
+                self._prev_result = len(faces) > 0
+                return self._prev_result
             except Exception as e:
                 logger.error(f"Error in face detection: {e}")
                 return False
     
+    @staticmethod
+    def _frame_hash(frame):
+        """
+        Compute a 64-bit difference hash (dHash) of a frame
+        
+        Args:
+            frame: Video frame in BGR format
+            
+        Returns:
+            int: One bit per horizontally adjacent pair of a 9x8 thumbnail, set where brightness increases
+        """
+        small = cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), 'big')
+    
     def _adjust_bed_position(self):
         """Adjust bed position to find faces"""
         logger.info("Starting bed position adjustment")
@@ -193,8 +352,8 @@ class AutoFaceTracker:
         logger.info(f"Executing action: {action}, duration: {duration} seconds")
         self._execute_bed_action(action)
         
-        # Wait for specified duration
-        time.sleep(duration)
+        # Wait for specified duration (cut short by stop(), which stops the bed itself)
+        self._stop_event.wait(duration)
         
         # If action is not stop, stop bed movement
         if action != "stop":
@@ -202,7 +361,7 @@ class AutoFaceTracker:
             self.arduino_controller.bed_stop()
         
         # Wait for bed to stabilize
-        time.sleep(self.movement_delay)
+        self._stop_event.wait(self.movement_delay)
         
         # Update sequence index
         self.current_sequence_index = (self.current_sequence_index + 1) % len(self.adjustment_sequence)
@@ -218,21 +377,10 @@ class AutoFaceTracker:
             logger.warning("Arduino controller is not initialized or not connected, cannot execute action")
             return
         
-        action_methods = {
-            "up": self.arduino_controller.bed_up,
-            "down": self.arduino_controller.bed_down,
-            "stop": self.arduino_controller.bed_stop,
-            "left_up": self.arduino_controller.left_up,
-            "left_down": self.arduino_controller.left_down,
-            "left_stop": self.arduino_controller.left_stop,
-            "right_up": self.arduino_controller.right_up,
-            "right_down": self.arduino_controller.right_down,
-            "right_stop": self.arduino_controller.right_stop
-        }
-        
-        if action in action_methods:
+        method = self._action_methods.get(action)
+        if method is not None:
             try:
-                action_methods[action]()
+                method()
                 logger.info(f"Executed bed action: {action}")
             except Exception as e:
                 logger.error(f"Error executing bed action {action}: {e}")
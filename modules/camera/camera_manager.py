@@ -7,11 +7,18 @@ Camera Management Module - Responsible for video capture and stream processing
 
 import cv2
 import logging
+import queue
 import threading
 import time
 import numpy as np
 from datetime import datetime
 import os
+from utils.cpu_affinity import pin_current_thread, CAPTURE_CORE, RECORDING_CORE
+# libjpeg-turbo binding for streaming, optional, cv2.imencode is used without it
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+except ImportError:
+    TurboJPEG = None
 # BEGIN AI FACE DETECTION IMPORTS
 import tflite_runtime.interpreter as tflite
 # END AI FACE DETECTION IMPORTS
@@ -19,13 +26,32 @@ import tflite_runtime.interpreter as tflite
 # Configure logging
 logger = logging.getLogger(__name__)
 
+class _JpegFrameBuffer:
+    """File-like sink for picamera2's MJPEGEncoder, keeps only the latest JPEG frame"""
+    
+    def __init__(self):
+        self.frame = None
+    
+    def write(self, buf):
+        # The encoder writes one complete JPEG per call
+        self.frame = bytes(buf)
+        return len(buf)
+    
+    def flush(self):
+        pass
+
 class CameraManager:
     """Camera management class, responsible for video capture and processing"""
     
     def __init__(self, resolution=(640, 480), framerate=30, use_picamera=True, 
                  enable_ai_face_detection=False, # AI feature switch
                  cascade_path="/home/jeong/opencv_cascades/haarcascade_frontalface_default.xml", # TODO: Make this configurable
-                 tflite_model_path="/home/jeong/frontal_face_classifier.tflite" # TODO: Make this configurable
+                 tflite_model_path="/home/jeong/frontal_face_classifier.tflite", # TODO: Make this configurable
+                 face_detector_model_path=None,
+                 hardware_jpeg=False,
+                 use_opencl=False,
+                 draw_timestamp=True,
+                 pin_threads=False
                 ):
         """
         Initialize camera manager
@@ -37,6 +63,17 @@ class CameraManager:
             enable_ai_face_detection (bool): Whether to enable AI face detection
             cascade_path (str): Path to Haar cascade model
             tflite_model_path (str): Path to TFLite model
+            face_detector_model_path (str, optional): Path to a YuNet ONNX face detection model,
+                replaces the Haar cascade as detection stage when given (needs OpenCV >= 4.5.4)
+            hardware_jpeg (bool): Serve get_jpeg_frame() from the Pi's hardware MJPEG encoder
+                instead of cv2.imencode (picamera2 only). These frames come straight from the
+                sensor, so they carry no face detection boxes or timestamp
+            use_opencl (bool): Run the Haar face detection chain through OpenCV's OpenCL (T-API)
+                backend, ignored if OpenCV finds no OpenCL device
+            draw_timestamp (bool): Stamp the time on streamed, recorded and debug window frames
+            pin_threads (bool): Pin the capture and recording threads to their own CPU cores and
+                raise the capture thread's priority. The capture thread also runs the AI face
+                detection, which is then limited to that one core
         """
         self.resolution = resolution
         self.framerate = framerate
@@ -45,9 +82,21 @@ class CameraManager:
         self.is_running = False
         self.is_recording = False
         self.recording_thread = None
+        self._recording_queue = queue.Queue(maxsize=2) # Captured frames waiting for the recording thread
         self.current_frame = None
         self.frame_lock = threading.Lock()
-        self.frame_available = threading.Event()
+        # Signalled on every published frame, _frame_seq counts them so readers can wait for a newer one
+        self._frame_cv = threading.Condition(self.frame_lock)
+        self._frame_seq = 0
+        self._jpeg_cache = (None, None, None) # (frame, quality, JPEG bytes) of the last encode
+        self._jpeg_lock = threading.Lock()
+        self._turbojpeg = self._init_turbojpeg()
+        self.hardware_jpeg = hardware_jpeg
+        self._hardware_jpeg_output = None # _JpegFrameBuffer fed by the hardware encoder, if running
+        self.use_opencl = use_opencl
+        self.draw_timestamp = draw_timestamp
+        self.pin_threads = pin_threads
+        self._timestamp = (None, "") # (second, text), strftime only runs once per second
         self.clients = []
         self.clients_lock = threading.Lock()
         self.debug_window_active = False
@@ -56,18 +105,31 @@ class CameraManager:
         # AI Face Detection attributes
         self.enable_ai_face_detection = enable_ai_face_detection
         self.face_cascade = None
+        self.face_detector = None # YuNet detector, used instead of face_cascade if loaded
+        self._detector_input_size = None
+        self._gray = None # Reused grayscale buffer for the Haar cascade, written by the capture thread only
         self.tflite_interpreter = None
         self.tflite_input_details = None
         self.tflite_output_details = None
+        self._tflite_batch_size = 1 # Batch dimension the interpreter is currently allocated for
+        self._tflite_batching = True # Cleared if the model can't be resized to a batch
+        self._tflite_input = None # Reused float input buffer, reallocated when the face count changes
 
         if self.enable_ai_face_detection:
-            self._initialize_ai_models(cascade_path, tflite_model_path)
+            self._initialize_ai_models(cascade_path, tflite_model_path, face_detector_model_path)
         
         # Initialize camera
         self._init_camera()
     
     def _init_camera(self):
         """Initialize camera"""
+        # OpenCL offload (GPU or VC4CL on the Pi), UMat inputs only use it while this is enabled
+        if self.use_opencl:
+            self.use_opencl = cv2.ocl.haveOpenCL()
+            if not self.use_opencl:
+                logger.warning("No OpenCL device available, face detection stays on the CPU")
+        cv2.ocl.setUseOpenCL(self.use_opencl)
+        
         try:
             logger.debug(f"Attempting to initialize camera with resolution: {self.resolution} (type: {type(self.resolution)}) and framerate: {self.framerate}")
             # Try to use PiCamera library (if available and enabled)
@@ -76,11 +138,15 @@ class CameraManager:
                     from picamera2 import Picamera2
                     self.camera = Picamera2()
                     config = self.camera.create_video_configuration(
+                        # libcamera's "RGB888" is stored as [B, G, R] per pixel, i.e. already OpenCV's BGR layout
                         main={"size": self.resolution, "format": "RGB888"},
                         controls={"FrameRate": self.framerate}
                     )
                     self.camera.configure(config)
-                    self.camera.start()
+                    if self.hardware_jpeg:
+                        self._start_hardware_jpeg()
+                    if self._hardware_jpeg_output is None:
+                        self.camera.start()
                     logger.info("Raspberry Pi camera initialized")
                 except (ImportError, ModuleNotFoundError):
                     logger.warning("Could not import picamera2 module, falling back to OpenCV")
@@ -115,23 +181,56 @@ class CameraManager:
             self.camera = None
             self.is_running = False # Ensure is_running is set to False on failure
     
-    def _initialize_ai_models(self, cascade_path, tflite_model_path):
+    @staticmethod
+    def _init_turbojpeg():
+        """Load libjpeg-turbo through PyTurboJPEG, returns None if either is missing"""
+        if TurboJPEG is None:
+            return None
+        try:
+            return TurboJPEG()
+        except Exception as e:
+            # PyTurboJPEG installed but the libturbojpeg shared library isn't
+            logger.warning(f"Could not load libjpeg-turbo: {e}, using OpenCV JPEG encoding")
+            return None
+    
+    def _start_hardware_jpeg(self):
+        """Start the camera with the hardware MJPEG encoder, leaves it stopped on failure"""
+        try:
+            from picamera2.encoders import MJPEGEncoder
+            from picamera2.outputs import FileOutput
+            output = _JpegFrameBuffer()
+            # start_recording() also starts the camera, capture_array() keeps working alongside
+            self.camera.start_recording(MJPEGEncoder(), FileOutput(output))
+            self._hardware_jpeg_output = output
+            logger.info("Hardware JPEG encoder started")
+        except Exception as e:
+            # e.g. Pi 5, which has no hardware JPEG encoder
+            logger.warning(f"Could not start hardware JPEG encoder: {e}, using OpenCV encoding")
+            self._hardware_jpeg_output = None
+    
+    def _initialize_ai_models(self, cascade_path, tflite_model_path, face_detector_model_path=None):
         """Initialize AI face recognition models"""
         logger.info("Initializing AI face detection models...")
-        # 1. Haar cascade path setup and loading
+        # 1. Face detection stage: a YuNet CNN finds faces in one forward pass, much
+        # faster than the Haar sliding window; the Haar cascade remains the fallback
+        if face_detector_model_path:
+            self._initialize_face_detector(face_detector_model_path)
+        
+        # Haar cascade path setup and loading (only needed without YuNet)
         # TODO: These paths should be made configurable (e.g., via settings file or env vars)
         # For now, using the provided paths.
-        if not os.path.exists(cascade_path):
-            logger.error(f"Haar cascade file not found: {cascade_path}")
-            self.enable_ai_face_detection = False # Disable AI if model is missing
-            return
-        try:
-            self.face_cascade = cv2.CascadeClassifier(cascade_path)
-            logger.info(f"Haar cascade loaded from {cascade_path}")
-        except Exception as e:
-            logger.error(f"Error loading Haar cascade from {cascade_path}: {e}")
-            self.enable_ai_face_detection = False
-            return
+        if self.face_detector is None:
+            if not os.path.exists(cascade_path):
+                logger.error(f"Haar cascade file not found: {cascade_path}")
+                self.enable_ai_face_detection = False # Disable AI if model is missing
+                return
+            try:
+                self.face_cascade = cv2.CascadeClassifier(cascade_path)
+                logger.info(f"Haar cascade loaded from {cascade_path}")
+            except Exception as e:
+                logger.error(f"Error loading Haar cascade from {cascade_path}: {e}")
+                self.enable_ai_face_detection = False
+                return
 
         # 2. TFLite model loading
         if not os.path.exists(tflite_model_path):
@@ -139,7 +238,14 @@ class CameraManager:
             self.enable_ai_face_detection = False # Disable AI if model is missing
             return
         try:
-            self.tflite_interpreter = tflite.Interpreter(model_path=tflite_model_path)
+            # Use all Pi cores (at most 4) for inference, recent tflite_runtime builds run float
+            # models through the NEON-optimized XNNPACK kernels, which honour num_threads
+            num_threads = min(os.cpu_count() or 1, 4)
+            try:
+                self.tflite_interpreter = tflite.Interpreter(model_path=tflite_model_path, num_threads=num_threads)
+            except TypeError:
+                # Old tflite_runtime without num_threads
+                self.tflite_interpreter = tflite.Interpreter(model_path=tflite_model_path)
             self.tflite_interpreter.allocate_tensors()
             self.tflite_input_details = self.tflite_interpreter.get_input_details()
             self.tflite_output_details = self.tflite_interpreter.get_output_details()
@@ -150,15 +256,66 @@ class CameraManager:
             return
         logger.info("AI face detection models initialized successfully.")
 
+    def _initialize_face_detector(self, model_path):
+        """Load the YuNet face detector, leaves face_detector as None if unavailable"""
+        if not hasattr(cv2, 'FaceDetectorYN'):
+            logger.warning("OpenCV has no FaceDetectorYN (needs >= 4.5.4), using Haar cascade instead")
+            return
+        if not os.path.exists(model_path):
+            logger.warning(f"Face detector model not found: {model_path}, using Haar cascade instead")
+            return
+        try:
+            width, height = self.resolution[0], self.resolution[1]
+            self.face_detector = cv2.FaceDetectorYN.create(model_path, "", (width, height))
+            self._detector_input_size = (width, height)
+            logger.info(f"YuNet face detector loaded from {model_path}")
+        except Exception as e:
+            logger.warning(f"Error loading face detector from {model_path}: {e}, using Haar cascade instead")
+            self.face_detector = None
+    
+    def _detect_face_boxes(self, frame):
+        """
+        Find faces in a frame with the loaded detection stage
+        
+        Args:
+            frame: Video frame in BGR format
+            
+        Returns:
+            Iterable of (x, y, w, h) face boxes
+        """
+        if self.face_detector is not None:
+            height, width = frame.shape[:2]
+            if self._detector_input_size != (width, height):
+                self.face_detector.setInputSize((width, height))
+                self._detector_input_size = (width, height)
+            _, detections = self.face_detector.detect(frame)
+            if detections is None:
+                return ()
+            # Rows are x, y, w, h, 5 landmarks, score; boxes may reach past the frame edges
+            boxes = detections[:, :4].astype(np.int32)
+            np.maximum(boxes, 0, out=boxes)
+            return boxes
+        
+        if self.use_opencl:
+            # Conversion and cascade run on the OpenCL device, the boxes come back as a numpy array
+            gray = cv2.cvtColor(cv2.UMat(frame), cv2.COLOR_BGR2GRAY)
+        else:
+            # Convert into last frame's buffer, OpenCV only reallocates it if the frame size changes
+            gray = self._gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        # Parameters for detectMultiScale can be tuned
+        return self.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30,30))
+    
     def _apply_ai_face_detection(self, frame_to_process):
         """Apply AI face detection and classification on the given frame"""
-        if not self.enable_ai_face_detection or self.face_cascade is None or self.tflite_interpreter is None:
+        if (not self.enable_ai_face_detection or self.tflite_interpreter is None
+                or (self.face_detector is None and self.face_cascade is None)):
             return frame_to_process
 
-        gray = cv2.cvtColor(frame_to_process, cv2.COLOR_BGR2GRAY)
-        # Parameters for detectMultiScale can be tuned
-        faces = self.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30,30))
+        faces = self._detect_face_boxes(frame_to_process)
 
+        # Preprocess every face first, so the classifier runs once for all of them
+        boxes = []
+        face_rois = []
         for (x, y, w, h) in faces:
             face_roi = frame_to_process[y:y+h, x:x+w]
             
@@ -177,16 +334,15 @@ class CameraManager:
                 logger.debug("Face ROI resized to an empty image. Skipping.")
                 continue
 
-            input_data = face_resized.astype(np.float32) / 255.0
-            input_data = np.expand_dims(input_data, axis=0)
+            boxes.append((x, y, w, h))
+            face_rois.append(face_resized)
 
-            self.tflite_interpreter.set_tensor(self.tflite_input_details[0]['index'], input_data)
-            self.tflite_interpreter.invoke()
-            output_data = self.tflite_interpreter.get_tensor(self.tflite_output_details[0]['index'])
-            
-            # Assuming output_data[0][0] is the probability for "Front"
-            probability_front = output_data[0][0] 
-            
+        if not face_rois:
+            return frame_to_process
+
+        probabilities = self._classify_faces(face_rois)
+
+        for (x, y, w, h), probability_front in zip(boxes, probabilities):
             label = "Front" if probability_front >= 0.5 else "Non-Front"
             color = (0, 255, 0) if label == "Front" else (0, 0, 255)
             prob_text = f"{label} ({probability_front:.2f})"
@@ -196,15 +352,68 @@ class CameraManager:
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
         return frame_to_process
     
+    def _classify_faces(self, face_rois):
+        """
+        Run the TFLite front/non-front classifier on preprocessed face images
+        
+        All faces go through one invoke() as a batch when the model accepts a resized
+        batch dimension, otherwise (e.g., fixed-batch models) one invoke() per face.
+        
+        Args:
+            face_rois (list): Face images already resized to the model's input size
+            
+        Returns:
+            list: Probability of "Front" for each face
+        """
+        interpreter = self.tflite_interpreter
+        input_index = self.tflite_input_details[0]['index']
+        output_index = self.tflite_output_details[0]['index']
+        
+        # Normalize straight into a reused float buffer, no stack/astype/divide temporaries
+        count = len(face_rois)
+        input_data = self._tflite_input
+        if input_data is None or input_data.shape[0] != count:
+            input_data = self._tflite_input = np.empty((count,) + face_rois[0].shape, dtype=np.float32)
+        for i, face_roi in enumerate(face_rois):
+            np.multiply(face_roi, 1.0 / 255.0, out=input_data[i], casting='unsafe')
+        
+        if self._tflite_batching and count != self._tflite_batch_size:
+            try:
+                interpreter.resize_tensor_input(input_index, input_data.shape)
+                interpreter.allocate_tensors()
+                self._tflite_batch_size = count
+            except Exception as e:
+                logger.info(f"TFLite model doesn't support batched input ({e}), classifying faces one at a time")
+                self._tflite_batching = False
+                interpreter.resize_tensor_input(input_index, (1,) + input_data.shape[1:])
+                interpreter.allocate_tensors()
+                self._tflite_batch_size = 1
+        
+        if self._tflite_batch_size == count:
+            interpreter.set_tensor(input_index, input_data)
+            interpreter.invoke()
+            # Assuming output_data[i][0] is the probability for "Front"
+            return interpreter.get_tensor(output_index)[:, 0].tolist()
+        
+        probabilities = []
+        for i in range(count):
+            interpreter.set_tensor(input_index, input_data[i:i+1])
+            interpreter.invoke()
+            probabilities.append(interpreter.get_tensor(output_index)[0][0])
+        return probabilities
+    
     def _capture_loop(self):
         """Loop for capturing video frames"""
+        # Own core and a higher priority, so frames aren't late when the other threads are busy
+        if self.pin_threads:
+            pin_current_thread(CAPTURE_CORE, niceness=-5)
+        
         while self.is_running and self.camera:
             try:
                 # Get frame
                 if self.use_picamera:
                     # Use PiCamera API
-                    frame = self.camera.capture_array()
-                    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+                    frame = self.camera.capture_array() # Already BGR (see _init_camera), no conversion pass
                     success = True
                 else:
                     # Use OpenCV
@@ -215,45 +424,76 @@ class CameraManager:
                     if self.enable_ai_face_detection:
                         frame = self._apply_ai_face_detection(frame)
 
-                    # Add timestamp to frame
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    cv2.putText(
-                        frame, 
-                        timestamp, 
-                        (10, frame.shape[0] - 10), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 
-                        0.5, 
-                        (255, 255, 255), 
-                        1, 
-                        cv2.LINE_AA
-                    )
-                    
-                    # Update current frame
-                    with self.frame_lock:
-                        self.current_frame = frame.copy()
+                    # Publish the frame itself instead of a copy: every capture returns a new
+                    # array and it isn't touched after this point, read-only makes that explicit
+                    frame.flags.writeable = False
+                    with self._frame_cv:
+                        self.current_frame = frame
+                        self._frame_seq += 1
+                        self._frame_cv.notify_all()
                     
-                    # Set frame available event
-                    self.frame_available.set()
+                    # Hand the frame to the recording thread, dropping it if the writer is behind
+                    if self.is_recording:
+                        try:
+                            self._recording_queue.put_nowait(frame)
+                        except queue.Full:
+                            pass
                     
                     # Notify all clients
-                    self._notify_clients()
-                
-                # Wait appropriate time to maintain frame rate
-                time.sleep(1.0 / self.framerate)
+                    self._notify_clients(frame)
+                else:
+                    # No frame this time, retry at frame cadence instead of spinning.
+                    # (After a successful read there is no sleep: both capture_array() and
+                    # read() block until the next frame, so the camera sets the pace.)
+                    time.sleep(1.0 / self.framerate)
                 
             except Exception as e:
                 logger.error(f"Error capturing video frame: {e}")
                 time.sleep(1)  # Pause after error
     
-    def _notify_clients(self):
-        """Notify all registered clients that a new frame is available"""
+    def _draw_timestamp(self, frame):
+        """
+        Draw the current time in the bottom left corner of a frame
+        
+        Only done for frames people look at (stream, recording, debug window), the
+        face detection consumers get the frame without it.
+        
+        Args:
+            frame: Writable BGR frame, modified in place
+        """
+        if not self.draw_timestamp:
+            return
+        
+        second = int(time.time())
+        cached_second, timestamp = self._timestamp
+        if second != cached_second:
+            timestamp = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+            self._timestamp = (second, timestamp)
+        cv2.putText(
+            frame, 
+            timestamp, 
+            (10, frame.shape[0] - 10), 
+            cv2.FONT_HERSHEY_SIMPLEX, 
+            0.5, 
+            (255, 255, 255), 
+            1, 
+            cv2.LINE_AA
+        )
+    
+    def _notify_clients(self, frame):
+        """
+        Notify all registered clients that a new frame is available
+        
+        Args:
+            frame: The new BGR frame, shared by all clients (read-only, copy before modifying)
+        """
         with self.clients_lock:
             # Create a copy of the client list to avoid modifying the list during iteration
             clients_copy = self.clients.copy()
         
         for callback in clients_copy:
             try:
-                callback(self.get_frame())
+                callback(frame)
             except Exception as e:
                 logger.error(f"Error notifying client: {e}")
                 # If callback fails, remove the client
@@ -272,7 +512,11 @@ class CameraManager:
         
         if self.camera:
             if self.use_picamera:
-                self.camera.stop()
+                if self._hardware_jpeg_output is not None:
+                    self.camera.stop_recording()
+                    self._hardware_jpeg_output = None
+                else:
+                    self.camera.stop()
                 self.camera.close()
             else:
                 self.camera.release()
@@ -280,10 +524,14 @@ class CameraManager:
             self.camera = None
             logger.info("Camera closed")
     
-    def get_frame(self):
+    def get_frame(self, copy=True):
         """
         Get current video frame
         
+        Args:
+            copy (bool): Return a private, writable copy. False returns the shared
+                read-only frame without copying (for callers that only read it)
+        
         Returns:
             numpy.ndarray: BGR formatted video frame
         """
@@ -302,38 +550,82 @@ class CameraManager:
             )
             return black_frame
         
-        # Wait for frame to be available
-        self.frame_available.wait(timeout=1.0)
-        
-        # Get a copy of the current frame
+        # Get the current frame (a copy unless the caller only reads it)
         with self.frame_lock:
             if self.current_frame is not None:
-                return self.current_frame.copy()
+                return self.current_frame.copy() if copy else self.current_frame
             else:
                 return np.zeros((480, 640, 3), dtype=np.uint8)
     
+    def get_frame_since(self, last_seq, timeout=1.0):
+        """
+        Wait for a frame newer than the one a reader has already seen
+        
+        Args:
+            last_seq (int): Sequence number returned by the previous call, 0 initially
+            timeout (float): Longest time to wait (seconds)
+            
+        Returns:
+            tuple: (sequence number, shared read-only BGR frame), the frame is None
+                if no newer frame arrived within the timeout
+        """
+        with self._frame_cv:
+            if not self._frame_cv.wait_for(lambda: self._frame_seq > last_seq, timeout):
+                return last_seq, None
+            return self._frame_seq, self.current_frame
+    
     def get_jpeg_frame(self, quality=90):
         """
         Get JPEG encoded current frame
         
         Args:
-            quality (int): JPEG quality, range 0-100
+            quality (int): JPEG quality, range 0-100 (not used for hardware encoded frames)
             
         Returns:
             bytes: JPEG encoded video frame
         """
-        frame = self.get_frame()
-        ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
-        if ret:
-            return jpeg.tobytes()
-        return None
+        # Hardware encoded frame, no CPU spent on encoding
+        if self._hardware_jpeg_output is not None and self.is_running:
+            jpeg_bytes = self._hardware_jpeg_output.frame
+            if jpeg_bytes is not None:
+                return jpeg_bytes
+        
+        frame = self.get_frame(copy=False)
+        
+        # Encode each captured frame only once, however many clients are streaming it.
+        # Encoding under the lock makes concurrent requests for the same frame wait for
+        # that one encode instead of repeating it.
+        with self._jpeg_lock:
+            cached_frame, cached_quality, cached_jpeg = self._jpeg_cache
+            if cached_frame is frame and cached_quality == quality:
+                return cached_jpeg
+            
+            # Timestamp on a copy, the shared frame is read-only
+            stamped_frame = frame
+            if self.draw_timestamp:
+                stamped_frame = frame.copy()
+                self._draw_timestamp(stamped_frame)
+            if self._turbojpeg is not None:
+                # NEON SIMD encoder, straight from the BGR frame
+                jpeg_bytes = self._turbojpeg.encode(
+                    stamped_frame,
+                    quality=quality,
+                    pixel_format=TJPF_BGR,
+                    jpeg_subsample=TJSAMP_420
+                )
+            else:
+                ret, jpeg = cv2.imencode('.jpg', stamped_frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                jpeg_bytes = jpeg.tobytes() if ret else None
+            self._jpeg_cache = (frame, quality, jpeg_bytes)
+            return jpeg_bytes
     
     def register_client(self, callback):
         """
         Register a video frame client
         
         Args:
-            callback (callable): Callback function to call when a new frame is available
+            callback (callable): Callback function to call when a new frame is available,
+                called on the capture thread with the frame, which it must not modify
         """
         with self.clients_lock:
             if callback not in self.clients:
@@ -368,7 +660,9 @@ class CameraManager:
         filename = f"video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
         output_file = os.path.join(output_path, filename)
         
-        # Start recording
+        # Start recording, without frames left over from a previous recording
+        while not self._recording_queue.empty():
+            self._recording_queue.get_nowait()
         self.is_recording = True
         self.recording_thread = threading.Thread(
             target=self._recording_loop,
@@ -392,6 +686,8 @@ class CameraManager:
     
     def _recording_loop(self, output_file):
         """Video recording loop"""
+        if self.pin_threads:
+            pin_current_thread(RECORDING_CORE)
         try:
             # Set video codec
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
@@ -403,13 +699,15 @@ class CameraManager:
             )
             
             while self.is_recording and self.is_running:
-                # Get current frame and write to video
-                frame = self.get_frame()
-                if frame is not None:
-                    out.write(frame)
-                
-                # Short sleep to reduce CPU usage
-                time.sleep(0.01)
+                # Write each frame the capture loop queued, timeout to notice stop_recording()
+                try:
+                    frame = self._recording_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if self.draw_timestamp:
+                    frame = frame.copy()
+                    self._draw_timestamp(frame)
+                out.write(frame)
                 
         except Exception as e:
             logger.error(f"Error recording video: {e}")
@@ -473,10 +771,11 @@ class CameraManager:
                 
             while self.debug_window_active and self.is_running:
                 # Get current frame and display in window
-                frame = self.get_frame()
+                frame = self.get_frame(copy=False)
                 if frame is not None:
-                    # Add debug information
+                    # Add debug information (on its own copy, the shared frame is read-only)
                     debug_frame = frame.copy()
+                    self._draw_timestamp(debug_frame)
                     cv2.putText(
                         debug_frame,
                         f"Resolution: {self.resolution[0]}x{self.resolution[1]} | FPS: {self.framerate}",
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Bed Command Merging Test Script
+Checks how bed commands are merged, held and coalesced, no Arduino needed
+"""
+
+import logging
+import time
+
+from modules.arduino.serial_connection import SerialConnection
+from modules.arduino.bed_controller import (
+    BedController,
+    _collapse,
+    UP_COMMAND, DOWN_COMMAND, STOP_COMMAND,
+    LEFT_UP_COMMAND, LEFT_DOWN_COMMAND, LEFT_STOP_COMMAND,
+    RIGHT_UP_COMMAND, RIGHT_DOWN_COMMAND, RIGHT_STOP_COMMAND,
+    GET_STATUS_COMMAND
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("test_bed_commands")
+
+def test_pairs_in_both_orders():
+    """Left/right pairs become the whole bed command, whichever side comes first"""
+    assert _collapse([LEFT_UP_COMMAND, RIGHT_UP_COMMAND]) == [UP_COMMAND]
+    assert _collapse([RIGHT_UP_COMMAND, LEFT_UP_COMMAND]) == [UP_COMMAND]
+    assert _collapse([LEFT_DOWN_COMMAND, RIGHT_DOWN_COMMAND]) == [DOWN_COMMAND]
+    assert _collapse([RIGHT_DOWN_COMMAND, LEFT_DOWN_COMMAND]) == [DOWN_COMMAND]
+    assert _collapse([LEFT_STOP_COMMAND, RIGHT_STOP_COMMAND]) == [STOP_COMMAND]
+    assert _collapse([RIGHT_STOP_COMMAND, LEFT_STOP_COMMAND]) == [STOP_COMMAND]
+
+def test_unmatched_pairs_kept():
+    """Same side pairs and different actions are sent as they are"""
+    assert _collapse([LEFT_UP_COMMAND, LEFT_UP_COMMAND]) == [LEFT_UP_COMMAND, LEFT_UP_COMMAND]
+    assert _collapse([LEFT_UP_COMMAND, LEFT_DOWN_COMMAND]) == [LEFT_UP_COMMAND, LEFT_DOWN_COMMAND]
+    assert _collapse([LEFT_UP_COMMAND, RIGHT_DOWN_COMMAND]) == [LEFT_UP_COMMAND, RIGHT_DOWN_COMMAND]
+
+def test_odd_length():
+    """A command left over after merging keeps its place"""
+    assert _collapse([]) == []
+    assert _collapse([LEFT_UP_COMMAND]) == [LEFT_UP_COMMAND]
+    assert _collapse([LEFT_UP_COMMAND, RIGHT_UP_COMMAND, LEFT_STOP_COMMAND]) == [UP_COMMAND, LEFT_STOP_COMMAND]
+    assert _collapse([GET_STATUS_COMMAND, LEFT_UP_COMMAND, RIGHT_UP_COMMAND]) == [GET_STATUS_COMMAND, UP_COMMAND]
+    assert (_collapse([LEFT_UP_COMMAND, LEFT_UP_COMMAND, RIGHT_UP_COMMAND])
+            == [LEFT_UP_COMMAND, UP_COMMAND])
+
+class RecordingConnection(SerialConnection):
+    """Connection that never opens a port and records the commands sent through it"""
+    
+    def __init__(self):
+        super().__init__("/dev/null")
+        self.is_connected = True
+        self.sent = []
+    
+    def send_raw(self, payload):
+        self.sent.append(payload)
+        return True
+
+def _create_bed(pair_window=0.5):
+    """Create a bed controller on a recording connection, a long pair window keeps timing out of the way"""
+    connection = RecordingConnection()
+    bed = BedController(connection)
+    bed.set_pair_window(pair_window)
+    return bed, connection
+
+def _wait_for_sent(connection, count, timeout=1.0):
+    """Wait until the connection has recorded count commands"""
+    deadline = time.monotonic() + timeout
+    while len(connection.sent) < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+def test_side_command_held_for_other_side():
+    """The first side waits for the pair window, the other side merges with it"""
+    bed, connection = _create_bed()
+    assert bed.left_up()
+    assert connection.sent == []
+    assert bed.right_up()
+    assert connection.sent == [UP_COMMAND]
+    bed.close()
+
+def test_stop_after_held_side_command():
+    """A STOP after a held LEFT_UP goes out after it, never before"""
+    bed, connection = _create_bed()
+    bed.left_up()
+    bed.bed_stop()
+    assert connection.sent == [LEFT_UP_COMMAND, STOP_COMMAND]
+    bed.close()
+
+def test_pair_window_expires():
+    """Without the other side, the flush thread sends the held command on its own"""
+    bed, connection = _create_bed(pair_window=0.01)
+    bed.left_up()
+    _wait_for_sent(connection, 1)
+    assert connection.sent == [LEFT_UP_COMMAND]
+    
+    # And the next side command is held again
+    bed.right_down()
+    _wait_for_sent(connection, 2)
+    assert connection.sent == [LEFT_UP_COMMAND, RIGHT_DOWN_COMMAND]
+    bed.close()
+
+def test_close_flushes_held_command():
+    """Closing sends a still held command instead of dropping it"""
+    bed, connection = _create_bed(pair_window=10)
+    bed.right_stop()
+    bed.close()
+    assert connection.sent == [RIGHT_STOP_COMMAND]
+
+def test_coalescing_keeps_stops():
+    """Repeated movement commands are dropped, repeated stops never"""
+    bed, connection = _create_bed()
+    bed.bed_up()
+    bed.bed_up()
+    bed.bed_stop()
+    bed.bed_stop()
+    bed.left_stop()
+    bed.right_stop()
+    assert connection.sent == [UP_COMMAND, STOP_COMMAND, STOP_COMMAND, STOP_COMMAND]
+    bed.close()
+
+def main():
+    """Main function"""
+    for test in (test_pairs_in_both_orders, test_unmatched_pairs_kept, test_odd_length,
+                 test_side_command_held_for_other_side, test_stop_after_held_side_command,
+                 test_pair_window_expires, test_close_flushes_held_command,
+                 test_coalescing_keeps_stops):
+        test()
+        logger.info(f"{test.__name__} passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Auto Face Tracker Test Script
+Checks when missed faces trigger a bed adjustment, no camera or Arduino needed
+"""
+
+import logging
+
+from modules.auto_face_tracker import AutoFaceTracker
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("test_face_tracker")
+
+def _create_tracker(face_detection_threshold):
+    """Create a tracker without camera and Arduino, counting its bed adjustments"""
+    tracker = AutoFaceTracker(None, None, face_detection_threshold=face_detection_threshold)
+    tracker.adjustments = 0
+    def adjust():
+        tracker.adjustments += 1
+    tracker._adjust_bed_position = adjust
+    return tracker
+
+def test_adjusts_after_threshold_misses():
+    """Only a full run of misses triggers an adjustment, a face in between starts over"""
+    tracker = _create_tracker(3)
+    for detected in (False, False, True, False, False):
+        tracker._record_detection(detected)
+    assert tracker.adjustments == 0
+    assert tracker.no_face_count == 2
+
+    tracker._record_detection(False)
+    assert tracker.adjustments == 1
+    assert tracker.no_face_count == 0
+
+def test_raised_threshold():
+    """A threshold raised after construction needs that many misses"""
+    tracker = _create_tracker(3)
+    tracker._record_detection(False)
+    tracker.face_detection_threshold = 5
+    for _ in range(3):
+        tracker._record_detection(False)
+    assert tracker.adjustments == 0
+    assert tracker.no_face_count == 4
+
+    tracker._record_detection(False)
+    assert tracker.adjustments == 1
+
+def test_lowered_threshold():
+    """A threshold lowered below the current run of misses triggers on the next miss"""
+    tracker = _create_tracker(5)
+    for _ in range(3):
+        tracker._record_detection(False)
+    tracker.face_detection_threshold = 2
+    assert tracker.face_detection_threshold == 2
+    assert tracker.no_face_count == 2
+
+    tracker._record_detection(False)
+    assert tracker.adjustments == 1
+
+    # After the adjustment two more misses are needed
+    tracker._record_detection(False)
+    assert tracker.adjustments == 1
+    tracker._record_detection(False)
+    assert tracker.adjustments == 2
+
+def main():
+    """Main function"""
+    for test in (test_adjusts_after_threshold_misses, test_raised_threshold, test_lowered_threshold):
+        test()
+        logger.info(f"{test.__name__} passed")
+
+if __name__ == "__main__":
+    main()
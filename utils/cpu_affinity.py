@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+CPU Affinity Utility - Pins worker threads to their own cores on the Raspberry Pi
+"""
+
+import logging
+import os
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Core each long-running thread is pinned to on a 4-core Pi
+CAPTURE_CORE = 0
+TRACKING_CORE = 1
+RECORDING_CORE = 3
+
+def pin_current_thread(core, niceness=0):
+    """
+    Pin the calling thread to one CPU core and optionally raise its priority
+    
+    Does nothing where there are fewer than 4 cores, the core isn't usable by this
+    process or the platform has no sched_setaffinity (e.g., macOS, Windows).
+    
+    Args:
+        core (int): CPU core index
+        niceness (int): Nice increment, negative raises priority (needs CAP_SYS_NICE)
+        
+    Returns:
+        bool: Whether the thread was pinned
+    """
+    if not hasattr(os, 'sched_setaffinity') or (os.cpu_count() or 1) < 4:
+        return False
+    
+    try:
+        if core not in os.sched_getaffinity(0):
+            return False
+        # pid 0 is the calling thread on Linux, not the whole process
+        os.sched_setaffinity(0, {core})
+    except OSError as e:
+        logger.debug(f"Could not pin thread to core {core}: {e}")
+        return False
+    
+    if niceness:
+        try:
+            # Linux applies nice values per thread as well
+            os.nice(niceness)
+        except OSError as e:
+            logger.debug(f"Could not change thread priority by {niceness}: {e}")
+    
+    return True
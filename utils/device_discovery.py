@@ -15,6 +15,9 @@ import json
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Baud rate -> port found by discover_arduino_device, probing every port takes seconds
+_discovered_ports = {}
+
 def find_arduino_ports():
     """
     Find possible Arduino serial ports
@@ -94,16 +97,30 @@ def test_arduino_port(port, baud_rate=9600, timeout=2):
         logger.debug(f"Error testing port {port}: {e}")
         return False
 
+def clear_discovery_cache():
+    """Forget previously discovered ports, the next discovery scans all ports again"""
+    _discovered_ports.clear()
+
 def discover_arduino_device(baud_rate=9600):
     """
     Automatically discover and test connected Arduino devices
     
+    A found port is cached per baud rate and reused while the device node exists,
+    "not found" is not cached so a board plugged in later is still discovered.
+    
     Args:
         baud_rate (int): Baud rate
         
     Returns:
         str or None: Valid Arduino port found, or None if not found
     """
+    port = _discovered_ports.get(baud_rate)
+    if port is not None:
+        if os.path.exists(port):
+            logger.info(f"Using previously discovered Arduino device on port {port}")
+            return port
+        del _discovered_ports[baud_rate]
+    
     logger.info("Searching for Arduino devices...")
     
     # Get possible ports
@@ -115,6 +132,7 @@ def discover_arduino_device(baud_rate=9600):
         logger.info(f"Testing port {port}...")
         if test_arduino_port(port, baud_rate):
             logger.info(f"Found valid Arduino device on port {port}")
+            _discovered_ports[baud_rate] = port
             return port
     
     logger.warning("No valid Arduino device found")
@@ -8,8 +8,73 @@ Logger Utility Module - Provides unified logging configuration
 import logging
 import os
 import sys
+import threading
 from datetime import datetime
 
+class BufferedFileHandler(logging.FileHandler):
+    """
+    File handler that writes through a large buffer and flushes periodically
+    
+    The standard FileHandler flushes after every record, which costs one write
+    syscall per log line. This handler only flushes every flush_interval seconds
+    (and immediately for ERROR and above), so a crash may lose the last few
+    seconds of lower-level records.
+    """
+    
+    def __init__(self, filename, mode='a', encoding=None, buffer_size=65536, flush_interval=2.0):
+        """
+        Initialize buffered file handler
+        
+        Args:
+            filename (str): Log file path
+            mode (str): File open mode
+            encoding (str): File encoding
+            buffer_size (int): Write buffer size in bytes
+            flush_interval (float): Time between periodic flushes (seconds)
+        """
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        super().__init__(filename, mode, encoding)
+        
+        # Background thread flushing the buffer periodically
+        self._stop_flushing = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_loop)
+        self._flush_thread.daemon = True
+        self._flush_thread.start()
+    
+    def _open(self):
+        """Open the log file with a large write buffer"""
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                    encoding=self.encoding, errors=self.errors)
+    
+    def emit(self, record):
+        super().emit(record)
+        # Don't keep errors in the buffer, they matter most after a crash
+        if record.levelno >= logging.ERROR:
+            self.force_flush()
+    
+    def flush(self):
+        """Called by emit() after every record, deferred to the flush thread"""
+        pass
+    
+    def force_flush(self):
+        """Write buffered records to disk now"""
+        self.acquire()
+        try:
+            if self.stream and hasattr(self.stream, "flush"):
+                self.stream.flush()
+        finally:
+            self.release()
+    
+    def _flush_loop(self):
+        while not self._stop_flushing.wait(self.flush_interval):
+            self.force_flush()
+    
+    def close(self):
+        self._stop_flushing.set()
+        self.force_flush()
+        super().close()
+
 def setup_logger(name='baby_monitor', level=logging.INFO, log_dir='logs'):
     """
     Configure logger